@@ -1,114 +1,115 @@
 import arcade
-import math
-import random
-import sqlite3
-
-
-SCREEN_WIDTH = 1000
-SCREEN_HEIGHT = 600
-SCREEN_TITLE = "айзек"
-
-PLAYER_SPEED = 5
-ANIMATION_SPEED = 0.15
-BORDER = 100
-
-BULLET_SPEED = 7
-BULLET_SCALE = 0.7
-BULLET_RANGE = 400
-SHOOT_DELAY = 0.5
-
-MAP_LEFT = 100
-MAP_RIGHT = SCREEN_WIDTH - 100
-MAP_BOTTOM = 100
-MAP_TOP = SCREEN_HEIGHT - 50
-
-PLAYER_MAX_HP = 3
-ENEMY_MAX_HP = 3
-PEAR_ACTIVE_TIME = 5.0
-PEAR_REST_TIME = 2.0
-PEAR_MOVE_DELAY = 0.7
-
-
-class PearEnemy(arcade.Sprite):
-    def __init__(self, x, y):
-        super().__init__("images/grusha.png", scale=0.5)
-
-        self.center_x = x
-        self.center_y = y
-
-        self.hp = ENEMY_MAX_HP
-        self.state = "active"
-
-        self.state_timer = 0
-        self.move_timer = 0
-        self.hit_timer = 0
-
-        self.base_scale = 0.5
-        self.scale = self.base_scale
-
-    def update(self, delta_time):
-        self.state_timer += delta_time
-        self.move_timer += delta_time
-
-        if self.state == "active":
-            if self.move_timer >= PEAR_MOVE_DELAY:
-                self.move_timer = 0
-                self.random_move()
-
-            if self.state_timer >= PEAR_ACTIVE_TIME:
-                self.state = "rest"
-                self.state_timer = 0
-                self.move_timer = 0
-
-        elif self.state == "rest":
-            if self.state_timer >= PEAR_REST_TIME:
-                self.state = "active"
-                self.state_timer = 0
-
-        if self.hit_timer > 0:
-            self.hit_timer -= delta_time
-            self.color = arcade.color.RED_ORANGE
-            self.alpha = 180
-            self.center_x += random.randint(-2, 2)
-            self.center_y += random.randint(-2, 2)
+import argparse
+import time
+from collections import deque
+
+from pyglet.graphics import Batch, Group
+
+from animation import Animator, Clip, clips
+from assets import assets
+from constants import (
+    SCREEN_WIDTH, SCREEN_HEIGHT, SCREEN_TITLE,
+    BULLET_SCALE, BULLET_POOL_SIZE, MAX_PARTICLES, PARTICLE_FRAME_TIME,
+    FIXED_TIMESTEP, MAX_STEPS_PER_FRAME, REWIND_SECONDS, QUICKSAVE_PATH, DB_PATH,
+)
+from diagnostics import MemoryProfiler, gpu_stats, sprite_list_stats
+from preloader import RoomPreloader
+from profiler import FrameProfiler, ProfilerOverlay
+from quality import QualityGovernor
+from render import (
+    LAYER_BACKGROUND, LAYER_ENEMIES, LAYER_PLAYER, LAYER_EFFECTS, LAYER_HUD,
+    BackgroundLayer, Renderer, SpriteLayer,
+)
+from replay import ReplayRecorder, run_replay
+from simulation import GameSimulation
+from snapshot import SnapshotRing, load_snapshot, read_header, save_snapshot
+from storage import ResultWriter
+
+
+class BulletPool:
+    def __init__(self, capacity=BULLET_POOL_SIZE):
+        self.texture = assets.texture("bullet")
+        self.capacity = capacity
+        self.free = [self.create() for _ in range(capacity)]
+
+        self.hits = 0
+        self.misses = 0
+
+    def create(self):
+        return arcade.Sprite(self.texture, scale=BULLET_SCALE)
+
+    def acquire(self, x, y):
+        if self.free:
+            bullet = self.free.pop()
+            self.hits += 1
         else:
-            self.color = arcade.color.WHITE
-            self.alpha = 255
+            bullet = self.create()
+            self.misses += 1
 
-        if self.move_timer > PEAR_MOVE_DELAY - 0.3:
-            self.center_x += random.randint(-2, 2)
-            self.center_y += random.randint(-2, 2)
+        bullet.position = (x, y)
+        return bullet
 
-        if self.state == "active":
-            self.scale = 0.5 + math.sin(self.state_timer * 6) * 0.05
-        else:
-            self.scale = 0.5
-
-    def random_move(self):
-        self.center_x = random.randint(MAP_LEFT + 30, MAP_RIGHT - 30)
-        self.center_y = random.randint(MAP_BOTTOM + 30, MAP_TOP - 30)
+    def release(self, bullet):
+        if bullet.sprite_lists:
+            bullet.remove_from_sprite_lists()
+            if len(self.free) < self.capacity:
+                self.free.append(bullet)
 
 
-class Collider(arcade.Sprite):
-    def __init__(self, x, y, width, height):
-        super().__init__()
+class HudLabel:
+    def __init__(self, template, x, y, color, size, batch, groups):
+        self.template = template
+        self.value = None
 
-        self.texture = arcade.make_soft_square_texture(
-            1, arcade.color.WHITE, 0, 0
+        self.shadow = arcade.Text(
+            "", x + 2, y + 2, arcade.color.BLACK, size,
+            bold=True, batch=batch, group=groups[0]
         )
+        self.text = arcade.Text(
+            "", x, y, color, size,
+            bold=True, batch=batch, group=groups[1]
+        )
+
+    def set(self, value):
+        if value == self.value:
+            return
 
-        self.scale_x = width
-        self.scale_y = height
+        self.value = value
+        text = self.template.format(value)
+        self.shadow.text = text
+        self.text.text = text
 
-        self.center_x = x
-        self.center_y = y
+    def show_shadow(self, visible):
+        self.shadow.visible = visible
 
 
-class StartView(arcade.View):
+class Hud:
     def __init__(self):
+        self.batch = Batch()
+        self.groups = (Group(order=0), Group(order=1))
+        self.labels = {}
+
+    def add(self, name, template, x, y, color, size=22):
+        self.labels[name] = HudLabel(template, x, y, color, size, self.batch, self.groups)
+
+    def set(self, name, value):
+        self.labels[name].set(value)
+
+    def show_shadows(self, visible):
+        for label in self.labels.values():
+            label.show_shadow(visible)
+
+    def draw(self):
+        self.batch.draw()
+
+
+class StartView(arcade.View):
+    def __init__(self, **options):
         super().__init__()
 
-        self.background = arcade.load_texture("images/start.jpg")
+        self.options = options
+
+        self.background = assets.texture("start")
 
         self.start_area = arcade.rect.XYWH(
             SCREEN_WIDTH // 2,
@@ -132,7 +133,7 @@ class StartView(arcade.View):
 
     def on_key_press(self, key, modifiers):
         if key == arcade.key.ENTER:
-            game_view = GameView()
+            game_view = GameView(**self.options)
             game_view.setup()
             self.window.show_view(game_view)
 
@@ -143,517 +144,399 @@ class StartView(arcade.View):
         top = self.start_area.y + self.start_area.height / 2
 
         if left <= x <= right and bottom <= y <= top:
-            game_view = GameView()
+            game_view = GameView(**self.options)
             game_view.setup()
             self.window.show_view(game_view)
 
 
-class Particle(arcade.Sprite):
-    def __init__(self, x, y, textures):
-        super().__init__(textures[0], scale=1.0)
-
-        self.center_x = x
-        self.center_y = y
-
+class ParticleEmitter:
+    def __init__(self, sprite_list, textures, max_live=MAX_PARTICLES):
+        self.sprite_list = sprite_list
         self.textures = textures
-        self.frame = 0
-        self.timer = 0
-        self.frame_time = 0.05
+        self.max_live = max_live
+
+        # the short explosion skips every other frame and ends twice as
+        # soon, for when the frame budget is tight
+        self.clips = {
+            "full": clips.define(
+                "explosion",
+                lambda: Clip(textures, PARTICLE_FRAME_TIME, loop=False)
+            ),
+            "short": clips.define(
+                "explosion_short",
+                lambda: Clip(textures[::2], PARTICLE_FRAME_TIME, loop=False)
+            ),
+        }
+        self.clip = self.clips["full"]
+        self.animator = Animator(clips)
+        self.sprites = []
 
-    def update(self, delta_time: float = 1/60):
-        self.timer += delta_time
+        self.live = deque()
+        self.free = []
 
-        if self.timer >= self.frame_time:
-            self.timer = 0
-            self.frame += 1
+    def emit(self, x, y, scale):
+        if not self.max_live:
+            return
 
-            if self.frame >= len(self.textures):
-                self.remove_from_sprite_lists()
-                return
+        if len(self.live) >= self.max_live:
+            slot = self.live.popleft()
+            self.sprite_list.remove(self.sprites[slot])
+        elif self.free:
+            slot = self.free.pop()
+        else:
+            slot = int(self.animator.add(1)[0])
+            self.sprites.append(arcade.Sprite(self.textures[0]))
 
-            self.texture = self.textures[self.frame]
+        self.animator.play(slot, self.clip)
 
+        particle = self.sprites[slot]
+        particle.texture = self.animator.current(slot)
+        particle.position = x, y
+        particle.scale = scale
 
-class GameView(arcade.View):
-    def __init__(self):
-        super().__init__()
+        self.live.append(slot)
+        self.sprite_list.append(particle)
 
-        self.wall_list = arcade.SpriteList(use_spatial_hash=True)
-        self.physics_engine = None
+    def update(self):
+        changed, finished = self.animator.advance()
 
-        self.player_list = None
-        self.bullet_list = None
-        self.player = None
+        for slot in changed.tolist():
+            self.sprites[slot].texture = self.animator.current(slot)
 
-        self.up = self.down = self.left = self.right = False
-        self.shoot_up = self.shoot_down = False
-        self.shoot_left = self.shoot_right = False
+        for slot in finished.tolist():
+            self.live.remove(slot)
+            self.sprite_list.remove(self.sprites[slot])
+            self.free.append(slot)
 
-        self.facing = "down"
 
-        self.idle_texture = None
-        self.walk_textures = {}
+class GameView(arcade.View):
+    def __init__(self, seed=None, record_path=None, profile_path=None, floor_size=0,
+                 snapshot=None, memory_path=None, db_path=DB_PATH):
+        super().__init__()
 
-        self.current_frame = 0
-        self.animation_timer = 0
+        self.seed = seed
+        self.floor_size = floor_size
+        self.record_path = record_path
+        self.profile_path = profile_path
+        self.memory_path = memory_path
+        # None plays without saving results
+        self.db_path = db_path
+        self.snapshot = snapshot
+
+        self.sim = None
+        self.recorder = None
+        self.history = SnapshotRing(round(REWIND_SECONDS / FIXED_TIMESTEP))
+
+        if memory_path:
+            self.profiler = MemoryProfiler(memory_path, enabled=bool(profile_path))
+        else:
+            self.profiler = FrameProfiler(enabled=bool(profile_path))
+        self.profiler_overlay = ProfilerOverlay(self.profiler)
 
-        self.shoot_cooldown = 0
-        self.particles = arcade.SpriteList()
-        self.particle_textures = []
+        self.governor = QualityGovernor()
+        # seconds spent in update and draw since the governor last looked
+        self.frame_work = 0
 
-        self.maps = {
-            "first": arcade.load_texture("images/firstmap.jpg"),
-            "second": arcade.load_texture("images/secondmap.jpg"),
-            "third": arcade.load_texture("images/thirdmap.jpg"),
-        }
+        self.effects = None
+        self.bullet_pool = None
 
-        self.current_map = "first"
-        self.right_door = arcade.rect.XYWH(
-            SCREEN_WIDTH - 60,
-            SCREEN_HEIGHT // 2,
-            80,
-            160
-        )
+        self.particle_textures = []
+        self.particle_emitter = None
 
-        self.top_door = arcade.rect.XYWH(
-            SCREEN_WIDTH // 2,
-            SCREEN_HEIGHT - 60,
-            160,
-            80
-        )
+        self.background = None
+        self.renderer = None
+        self.preloader = None
 
-        self.left_door = arcade.rect.XYWH(
-            60,
-            SCREEN_HEIGHT // 2,
-            80,
-            160
-        )
+        self.hud = None
+        self.result_writer = None
+        self.started_at = None
 
-        self.bottom_door = arcade.rect.XYWH(
-            SCREEN_WIDTH // 2,
-            60,
-            160,
-            80
-        )
-        self.room_transition_cooldown = 0
+        self.accumulator = 0
+        self.frame_clock = 0
+        self.game_finished = False
 
     def setup(self):
-        self.player_list = arcade.SpriteList()
-        self.bullet_list = arcade.SpriteList()
-
-        self.idle_texture = arcade.load_texture("images/6f5a2da7e8e897eb91dd2771070e6918.png")
-        self.walk_textures = {
-            "down": [
-                arcade.load_texture("images/6f5a2da7e8e897eb91dd2771070e6918 (1).png"),
-                arcade.load_texture("images/6f5a2da7e8e897eb91dd2771070e6918 (2).png"),
-            ],
-            "up": [
-                arcade.load_texture("images/6f5a2da7e8e897eb91dd2771070e6918 (7).png"),
-                arcade.load_texture("images/6f5a2da7e8e897eb91dd2771070e6918 (8).png"),
-            ],
-            "left": [
-                arcade.load_texture("images/6f5a2da7e8e897eb91dd2771070e6918 (3).png"),
-                arcade.load_texture("images/6f5a2da7e8e897eb91dd2771070e6918 (4).png"),
-            ],
-            "right": [
-                arcade.load_texture("images/6f5a2da7e8e897eb91dd2771070e6918 (5).png"),
-                arcade.load_texture("images/6f5a2da7e8e897eb91dd2771070e6918 (6).png"),
-            ],
-        }
-        self.particle_textures = [
-            arcade.load_texture("images/chastitsa.png"),
-            arcade.load_texture("images/chastitsa(1).png"),
-            arcade.load_texture("images/chastitsa(2).png"),
-            arcade.load_texture("images/chastitsa(3).png"),
-            arcade.load_texture("images/chastitsa(4).png"),
-            arcade.load_texture("images/chastitsa(5).png"),
-            arcade.load_texture("images/chastitsa(6).png"),
-        ]
-        self.player = arcade.Sprite()
-        self.player.texture = self.idle_texture
-        self.player.scale = 2
-        self.player.center_x = SCREEN_WIDTH // 2
-        self.player.center_y = SCREEN_HEIGHT // 2
-        self.player_list.append(self.player)
-        self.enemies = arcade.SpriteList()
-        self.load_colliders()
-        self.physics_engine = arcade.PhysicsEngineSimple(
-            self.player,
-            self.wall_list
+        # bullets and explosions share one list, so they cost one draw call
+        self.effects = arcade.SpriteList()
+        self.bullet_pool = BulletPool()
+
+        self.particle_textures = assets.particle_frames()
+        self.particle_emitter = ParticleEmitter(
+            self.effects,
+            self.particle_textures
         )
-        self.player_hp = PLAYER_MAX_HP
-        self.spawn_enemies_for_room()
-        self.db_conn = sqlite3.connect("DatabaseIsaac.sqlite")
-        self.db_cursor = self.db_conn.cursor()
 
-        self.killed_pears = 0
+        self.sim = GameSimulation(
+            seed=self.seed,
+            floor_size=self.floor_size,
+            sprite_pool=self.bullet_pool,
+            sprite_list=self.effects
+        )
+        self.sim.profiler = self.profiler
+        if self.record_path:
+            self.recorder = ReplayRecorder(self.sim.seed, self.floor_size)
+
+        self.hud = Hud()
+        self.hud.add("hp", "HP: {}", 10, 10, arcade.color.RED)
+
+        self.background = BackgroundLayer(SCREEN_WIDTH, SCREEN_HEIGHT)
+        self.renderer = Renderer()
+        self.renderer.add(LAYER_BACKGROUND, "background", self.background)
+        self.renderer.add(LAYER_ENEMIES, "enemies", SpriteLayer(self.sim.enemies.sprite_list))
+        self.renderer.add(LAYER_PLAYER, "player", SpriteLayer(self.sim.player_list))
+        self.renderer.add(LAYER_EFFECTS, "effects", SpriteLayer(self.effects))
+        self.renderer.add(LAYER_HUD, "hud", self.hud)
+
+        self.preloader = RoomPreloader(self.sim.rooms)
+        if self.db_path:
+            self.result_writer = ResultWriter(self.db_path)
+        self.started_at = time.time()
+
+        self.accumulator = 0
+        self.frame_clock = time.perf_counter()
+        self.frame_work = 0
         self.game_finished = False
+        self.apply_quality()
+
+        if self.snapshot:
+            self.restore(self.snapshot)
+            self.snapshot = None
 
     def on_draw(self):
+        started = time.perf_counter()
         self.clear()
 
-        arcade.draw_texture_rect(
-            self.maps[self.current_map],
-            arcade.rect.XYWH(
-                SCREEN_WIDTH // 2,
-                SCREEN_HEIGHT // 2,
-                SCREEN_WIDTH,
-                SCREEN_HEIGHT
-            )
-        )
+        self.background.show(self.sim.room.background)
+        self.hud.set("hp", self.sim.player_hp)
+        self.renderer.draw(self.profiler.probe)
 
-        self.player_list.draw()
-        self.bullet_list.draw()
-        self.particles.draw()
-        self.draw_hud()
-        self.enemies.draw()
+        self.profiler_overlay.draw()
+        self.frame_work += time.perf_counter() - started
 
     def on_update(self, delta_time):
         if self.game_finished:
             return
 
-        self.player.change_x = 0
-        self.player.change_y = 0
-
-        moving = False
-
-        if self.up:
-            self.player.change_y = PLAYER_SPEED
-            self.facing = "up"
-            moving = True
-        elif self.down:
-            self.player.change_y = -PLAYER_SPEED
-            self.facing = "down"
-            moving = True
-        elif self.left:
-            self.player.change_x = -PLAYER_SPEED
-            self.facing = "left"
-            moving = True
-        elif self.right:
-            self.player.change_x = PLAYER_SPEED
-            self.facing = "right"
-            moving = True
-
-        if moving:
-            self.animation_timer += delta_time
-            if self.animation_timer >= ANIMATION_SPEED:
-                self.animation_timer = 0
-                frames = self.walk_textures[self.facing]
-                self.current_frame = (self.current_frame + 1) % len(frames)
-                self.player.texture = frames[self.current_frame]
-        else:
-            self.player.texture = self.idle_texture
-            self.current_frame = 0
-            self.animation_timer = 0
+        self.profiler_overlay.update(delta_time)
+        probe = self.profiler.probe
 
-        self.physics_engine.update()
+        self.accumulator += delta_time
+        self.frame_clock = time.perf_counter()
+        steps = 0
 
-        self.player.center_x = max(BORDER, min(self.player.center_x, SCREEN_WIDTH - BORDER))
-        self.player.center_y = max(BORDER, min(self.player.center_y, SCREEN_HEIGHT - BORDER))
+        if self.governor.update(self.frame_work):
+            self.apply_quality()
+        self.frame_work = 0
 
-        self.shoot_cooldown += delta_time
+        while self.accumulator >= FIXED_TIMESTEP:
+            if steps == MAX_STEPS_PER_FRAME:
+                self.accumulator = 0
+                break
 
-        if self.shoot_cooldown >= SHOOT_DELAY:
-            if self.shoot_up:
-                self.shoot("up")
-            elif self.shoot_down:
-                self.shoot("down")
-            elif self.shoot_left:
-                self.shoot("left")
-            elif self.shoot_right:
-                self.shoot("right")
+            with probe("tick"):
+                self.sim.step()
 
-        self.bullet_list.update()
+            # range and border explosions start animating this tick, wall
+            # and enemy hits on the next one
+            explosions = self.sim.explosions
+            split = self.sim.bound_explosions
 
-        margin = 100
+            with probe("explosions"):
+                for x, y, strong in explosions[:split]:
+                    self.spawn_explosion(x, y, strong=strong)
 
-        for bullet in list(self.bullet_list):
-            distance = math.dist(
-                (bullet.start_x, bullet.start_y),
-                (bullet.center_x, bullet.center_y)
-            )
+            with probe("particles"):
+                self.particle_emitter.update()
 
-            out_of_screen = (
-                    bullet.center_x < 0
-                    or bullet.center_x > SCREEN_WIDTH
-                    or bullet.center_y < 0
-                    or bullet.center_y > SCREEN_HEIGHT
+            with probe("explosions"):
+                for x, y, strong in explosions[split:]:
+                    self.spawn_explosion(x, y, strong=strong)
+
+            with probe("snapshot"):
+                self.history.push(self.sim.snapshot())
+
+            self.accumulator -= FIXED_TIMESTEP
+            steps += 1
+
+        with probe("sync"):
+            self.sim.projectiles.sync()
+
+        with probe("preload"):
+            self.preloader.update(
+                self.sim.room,
+                self.sim.player.center_x,
+                self.sim.player.center_y,
+                self.window.ctx.default_atlas
             )
 
-            if distance >= BULLET_RANGE or out_of_screen:
-                near_wall = (
-                        bullet.center_x < margin
-                        or bullet.center_x > SCREEN_WIDTH - margin
-                        or bullet.center_y < margin
-                        or bullet.center_y > SCREEN_HEIGHT - margin
-                )
-
-                self.spawn_explosion(
-                    bullet.center_x,
-                    bullet.center_y,
-                    strong=near_wall
-                )
-
-                bullet.remove_from_sprite_lists()
-
-        if self.room_transition_cooldown > 0:
-            self.room_transition_cooldown -= delta_time
-
-        if self.room_transition_cooldown <= 0:
-            px = self.player.center_x
-            py = self.player.center_y
-            if self.current_map == "first":
-                if self._in_rect(px, py, self.right_door):
-                    self.current_map = "second"
-                    self.player.center_x = MAP_LEFT + 40
-                    self.player.center_y = SCREEN_HEIGHT // 2
-                    self.load_colliders()
-                    self.physics_engine = arcade.PhysicsEngineSimple(
-                        self.player,
-                        self.wall_list
-                    )
-                    self.spawn_enemies_for_room()
-                    self.room_transition_cooldown = 0.4
-
-                elif self._in_rect(px, py, self.top_door):
-                    self.current_map = "third"
-                    self.player.center_x = SCREEN_WIDTH // 2
-                    self.player.center_y = MAP_BOTTOM + 40
-                    self.load_colliders()
-                    self.physics_engine = arcade.PhysicsEngineSimple(
-                        self.player,
-                        self.wall_list
-                    )
-                    self.spawn_enemies_for_room()
-                    self.room_transition_cooldown = 0.4
-
-            elif self.current_map == "second":
-                if self._in_rect(px, py, self.left_door):
-                    self.current_map = "first"
-                    self.player.center_x = MAP_RIGHT - 40
-                    self.player.center_y = SCREEN_HEIGHT // 2
-                    self.load_colliders()
-                    self.physics_engine = arcade.PhysicsEngineSimple(
-                        self.player,
-                        self.wall_list
-                    )
-                    self.spawn_enemies_for_room()
-                    self.room_transition_cooldown = 0.4
-
-            elif self.current_map == "third":
-                if self._in_rect(px, py, self.bottom_door):
-                    self.current_map = "first"
-                    self.player.center_x = SCREEN_WIDTH // 2
-                    self.player.center_y = MAP_TOP - 40
-                    self.load_colliders()
-                    self.physics_engine = arcade.PhysicsEngineSimple(
-                        self.player,
-                        self.wall_list
-                    )
-                    self.spawn_enemies_for_room()
-                    self.room_transition_cooldown = 0.4
-
-        for bullet in self.bullet_list:
-            hit_wall = False
-            strong = False
-
-            if bullet.center_x <= MAP_LEFT:
-                bullet.center_x = MAP_LEFT
-                hit_wall = True
-                strong = True
-
-            elif bullet.center_x >= MAP_RIGHT:
-                bullet.center_x = MAP_RIGHT
-                hit_wall = True
-                strong = True
-
-            elif bullet.center_y <= MAP_BOTTOM:
-                bullet.center_y = MAP_BOTTOM
-                hit_wall = True
-                strong = True
-
-            elif bullet.center_y >= MAP_TOP:
-                bullet.center_y = MAP_TOP
-                hit_wall = True
-                strong = True
-
-            if hit_wall:
-                self.spawn_explosion(bullet.center_x, bullet.center_y, strong=strong)
-                bullet.remove_from_sprite_lists()
-
-        self.particles.update()
-
-        for bullet in list(self.bullet_list):
-            hit_list = arcade.check_for_collision_with_list(bullet, self.wall_list)
-            if hit_list:
-                self.spawn_explosion(bullet.center_x, bullet.center_y, strong=True)
-                bullet.remove_from_sprite_lists()
-
-        self.enemies.update(delta_time)
-        for pear in self.enemies:
-            if pear.state == "active":
-                if arcade.check_for_collision(self.player, pear):
-                    self.player_hp -= 1
-                    print("Игрок получил урон")
-
-                    pear.state = "rest"
-                    pear.state_timer = 0
-
-                    if self.player_hp <= 0 and not self.game_finished:
-                        self.game_finished = True
-                        self.save_result_to_db("lose", "pear")
-                        self.game_over()
-
-        for bullet in list(self.bullet_list):
-            hit_list = arcade.check_for_collision_with_list(bullet, self.enemies)
-            for pear in hit_list:
-                pear.hp -= 1
-                pear.hit_timer = 0.3
-                bullet.remove_from_sprite_lists()
-
-                if pear.hp <= 0:
-                    pear.remove_from_sprite_lists()
-                    self.killed_pears += 1
-
-                    if self.killed_pears >= 2 and not self.game_finished:
-                        self.game_finished = True
-                        self.save_result_to_db("win", "player")
-                        self.game_over()
-
-    def shoot(self, direction):
-        bullet = arcade.Sprite("images/bullet.png", scale=BULLET_SCALE)
-        bullet.center_x = self.player.center_x
-        bullet.center_y = self.player.center_y
-
-        bullet.start_x = bullet.center_x
-        bullet.start_y = bullet.center_y
-
-        if direction == "up":
-            bullet.change_y = BULLET_SPEED
-        elif direction == "down":
-            bullet.change_y = -BULLET_SPEED
-        elif direction == "left":
-            bullet.change_x = -BULLET_SPEED
-        elif direction == "right":
-            bullet.change_x = BULLET_SPEED
-
-        self.bullet_list.append(bullet)
-        self.shoot_cooldown = 0
+        self.frame_work += time.perf_counter() - self.frame_clock
+
+        if self.memory_path:
+            self.track_memory()
+
+        if self.sim.game_finished:
+            self.game_finished = True
+            self.save_result_to_db()
+            self.game_over()
+
+    def track_memory(self):
+        sim = self.sim
+        values = sprite_list_stats({
+            "effects": self.effects,
+            "enemies": sim.enemies.sprite_list,
+            "player": sim.player_list,
+        })
+        values.update(gpu_stats(self.window.ctx))
+        values["walls"] = len(sim.wall_list)
+        values["bullets"] = sim.projectiles.count
+        values["particles"] = len(self.particle_emitter.live)
+        values["bullet_pool"] = len(self.bullet_pool.free)
+        values["history"] = len(self.history)
+        values["events"] = len(sim.events)
+
+        self.profiler.end_frame(sim.tick, sim.current_map, values)
+
+    def apply_quality(self):
+        tier = self.governor.tier
+        self.particle_emitter.max_live = tier["particles"]
+        self.particle_emitter.clip = self.particle_emitter.clips[tier["explosion"]]
+        self.hud.show_shadows(tier["shadow"])
 
     def on_key_press(self, key, modifiers):
-        if key == arcade.key.W:
-            self.up = True
-        elif key == arcade.key.S:
-            self.down = True
-        elif key == arcade.key.A:
-            self.left = True
-        elif key == arcade.key.D:
-            self.right = True
-        elif key == arcade.key.UP:
-            self.shoot_up = True
-        elif key == arcade.key.DOWN:
-            self.shoot_down = True
-        elif key == arcade.key.LEFT:
-            self.shoot_left = True
-        elif key == arcade.key.RIGHT:
-            self.shoot_right = True
+        if key == arcade.key.F3:
+            self.profiler_overlay.toggle()
+            self.profiler.enabled = self.profiler_overlay.visible or bool(self.profile_path)
+            return
+
+        if key == arcade.key.F5:
+            save_snapshot(QUICKSAVE_PATH, self.sim.snapshot())
+            print("Игра сохранена")
+            return
+
+        if key == arcade.key.F9:
+            try:
+                self.restore(load_snapshot(QUICKSAVE_PATH))
+            except (OSError, ValueError) as error:
+                print(f"Не удалось загрузить сохранение: {error}")
+            else:
+                self.history.clear()
+                print("Игра загружена")
+            return
+
+        if key == arcade.key.BACKSPACE:
+            data = self.history.rewind(round(1 / FIXED_TIMESTEP))
+            if data:
+                self.restore(data)
+            return
+
+        self.push_input(key, True)
 
     def on_key_release(self, key, modifiers):
-        if key == arcade.key.W:
-            self.up = False
-        elif key == arcade.key.S:
-            self.down = False
-        elif key == arcade.key.A:
-            self.left = False
-        elif key == arcade.key.D:
-            self.right = False
-        elif key == arcade.key.UP:
-            self.shoot_up = False
-        elif key == arcade.key.DOWN:
-            self.shoot_down = False
-        elif key == arcade.key.LEFT:
-            self.shoot_left = False
-        elif key == arcade.key.RIGHT:
-            self.shoot_right = False
+        self.push_input(key, False)
 
-    def spawn_explosion(self, x, y, strong=False):
-        particle = Particle(x, y, self.particle_textures)
+    def push_input(self, key, pressed):
+        # the accumulator holds the time already played past the last
+        # tick, the rest is how long ago the frame started
+        stamp = self.sim.time + self.accumulator + time.perf_counter() - self.frame_clock
+
+        if self.recorder:
+            self.recorder.record(stamp, key, pressed)
+        self.sim.push_input(stamp, key, pressed)
+
+    def restore(self, data):
+        self.sim.restore(data)
+        self.sim.projectiles.sync()
+        self.accumulator = 0
+        self.frame_clock = time.perf_counter()
 
+        # input after the restored tick never happened
+        if self.recorder:
+            self.recorder.truncate(self.sim.time)
+
+    def spawn_explosion(self, x, y, strong=False):
         if strong:
-            particle.scale = 2.4
+            self.particle_emitter.emit(x, y, 2.4)
         else:
-            particle.scale = 1.4
-
-        self.particles.append(particle)
-
-    def _in_rect(self, x, y, rect):
-        left = rect.x - rect.width / 2
-        right = rect.x + rect.width / 2
-        bottom = rect.y - rect.height / 2
-        top = rect.y + rect.height / 2
-
-        return left <= x <= right and bottom <= y <= top
-
-    def load_colliders(self):
-        self.wall_list.clear()
-
-        if self.current_map == "second":
-            self.wall_list.append(Collider(430, 230, 55, 55))
-            self.wall_list.append(Collider(430, 370, 55, 55))
-            self.wall_list.append(Collider(570, 370, 55, 55))
-            self.wall_list.append(Collider(570, 230, 55, 55))
-
-        elif self.current_map == "third":
-            self.wall_list.append(Collider(125, 125, 60, 60))
-            self.wall_list.append(Collider(125, SCREEN_HEIGHT - 160, 60, 60))
-            self.wall_list.append(Collider(180, SCREEN_HEIGHT - 80, 60, 60))
-            self.wall_list.append(Collider(SCREEN_WIDTH - 125, SCREEN_HEIGHT - 125, 60, 60))
-            self.wall_list.append(Collider(SCREEN_WIDTH - 125, 180, 60, 60))
-            self.wall_list.append(Collider(SCREEN_WIDTH - 185, 105, 60, 60))
-
-    def draw_hud(self):
-        arcade.draw_text(
-            f"HP: {self.player_hp}",
-            12, 12,
-            arcade.color.BLACK,
-            22,
-            bold=True
-        )
-        arcade.draw_text(
-            f"HP: {self.player_hp}",
-            10, 10,
-            arcade.color.RED,
-            22,
-            bold=True
-        )
+            self.particle_emitter.emit(x, y, 1.4)
 
-    def save_result_to_db(self, result, who_kill):
-        self.db_cursor.execute(
-            "INSERT INTO Data (result, who_kill) VALUES (?, ?)",
-            (result, who_kill)
-        )
-        self.db_conn.commit()
+    def save_result_to_db(self):
+        if not self.result_writer:
+            return
+
+        run = self.sim.run_record()
+        run["started_at"] = self.started_at
+        self.result_writer.save(run)
 
     def game_over(self):
         print("GAME OVER")
-        self.db_conn.close()
+        self.close_session()
         arcade.close_window()
 
-    def spawn_enemies_for_room(self):
-        self.enemies.clear()
-        if self.current_map != "first":
-            pear = PearEnemy(
-                random.randint(MAP_LEFT + 40, MAP_RIGHT - 40),
-                random.randint(MAP_BOTTOM + 40, MAP_TOP - 40)
-            )
-            self.enemies.append(pear)
+    def close_session(self):
+        if self.preloader:
+            if not self.preloader.close():
+                print(f"Ошибка предзагрузки комнат: {self.preloader.error}")
+            self.preloader = None
+
+        if self.result_writer:
+            if not self.result_writer.close():
+                error = self.result_writer.error
+                if error:
+                    print(f"Результат не сохранён: {error}")
+                else:
+                    print("Результат не успел сохраниться")
+            self.result_writer = None
+
+        if self.recorder:
+            self.recorder.save(self.record_path, self.sim.tick)
+            self.recorder = None
+
+        if self.profile_path:
+            self.profiler.dump(self.profile_path)
+            self.profile_path = None
+
+        if self.memory_path:
+            self.profiler.close()
+            self.memory_path = None
 
 
 def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--seed", type=int)
+    parser.add_argument("--floor", type=int, default=0, metavar="ROOMS", help="play a generated floor")
+    parser.add_argument("--record", metavar="PATH")
+    parser.add_argument("--replay", metavar="PATH")
+    parser.add_argument("--load", metavar="PATH", help="continue from a saved snapshot")
+    parser.add_argument("--profile", metavar="PATH", help="dump stage timings to .csv or .json on exit")
+    parser.add_argument("--memory", metavar="PATH", help="write a per-frame allocation timeline as JSON lines")
+    args = parser.parse_args()
+
+    if args.replay:
+        run_replay(args.replay)
+        return
+
+    snapshot = None
+    if args.load:
+        snapshot = load_snapshot(args.load)
+        args.seed, args.floor, _ = read_header(snapshot)
+
     game = arcade.Window(SCREEN_WIDTH, SCREEN_HEIGHT, SCREEN_TITLE)
-    game.show_view(StartView())
+    assets.build_atlas(game.ctx)
+    print(assets.report())
+
+    game.show_view(StartView(
+        seed=args.seed,
+        record_path=args.record,
+        profile_path=args.profile,
+        floor_size=args.floor,
+        snapshot=snapshot,
+        memory_path=args.memory
+    ))
     arcade.run()
 
+    if isinstance(game.current_view, GameView):
+        game.current_view.close_session()
+
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,103 @@
+import argparse
+
+from constants import DB_PATH
+from storage import connect
+
+
+BUCKETS = {
+    "hour": "%Y-%m-%d %H:00",
+    "day": "%Y-%m-%d",
+    "week": "%Y-W%W",
+    "month": "%Y-%m",
+}
+
+
+class RunAnalytics:
+    # every query is answered from an index or the hourly rollup, so they
+    # stay fast on tables filled by bulk playtests
+
+    def __init__(self, path=DB_PATH):
+        self.conn = connect(path)
+
+    def close(self):
+        self.conn.close()
+
+    def win_rate_over_time(self, bucket="day"):
+        rows = self.conn.execute(
+            """
+            SELECT strftime(?, hour * 3600, 'unixepoch') AS period,
+                   SUM(games), SUM(wins)
+            FROM run_hours
+            GROUP BY period
+            ORDER BY period
+            """,
+            (BUCKETS[bucket],)
+        ).fetchall()
+        return [(period, games, wins, wins / games) for period, games, wins in rows]
+
+    def deaths_per_room(self):
+        return self.conn.execute(
+            """
+            SELECT last_room, COUNT(*) AS deaths
+            FROM runs
+            WHERE result = 'lose' AND last_room IS NOT NULL
+            GROUP BY last_room
+            ORDER BY deaths DESC
+            """
+        ).fetchall()
+
+    def average_time_to_kill(self):
+        average, = self.conn.execute(
+            "SELECT AVG(first_kill) FROM runs WHERE first_kill IS NOT NULL"
+        ).fetchone()
+        return average
+
+    def damage_per_room(self):
+        return self.conn.execute(
+            """
+            SELECT room, COUNT(*) AS hits
+            FROM run_events
+            WHERE kind = 'damage'
+            GROUP BY room
+            ORDER BY hits DESC
+            """
+        ).fetchall()
+
+    def totals(self):
+        return self.conn.execute(
+            "SELECT COUNT(*), SUM(result = 'win'), SUM(result = 'lose') FROM runs"
+        ).fetchone()
+
+
+def report(path=DB_PATH, bucket="day"):
+    analytics = RunAnalytics(path)
+    try:
+        games, wins, losses = analytics.totals()
+        print(f"забегов: {games}, побед: {wins or 0}, поражений: {losses or 0}")
+
+        print("доля побед:")
+        for period, games, wins, rate in analytics.win_rate_over_time(bucket):
+            print(f"  {period}  {rate:6.1%}  ({wins}/{games})")
+
+        print("смерти по комнатам:")
+        for room, deaths in analytics.deaths_per_room():
+            print(f"  {room:<12} {deaths}")
+
+        print("урон по комнатам:")
+        for room, hits in analytics.damage_per_room():
+            print(f"  {room:<12} {hits}")
+
+        average = analytics.average_time_to_kill()
+        if average is not None:
+            print(f"среднее время до первого убийства: {average:.1f} с")
+    finally:
+        analytics.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--db", default=DB_PATH, metavar="PATH")
+    parser.add_argument("--bucket", choices=list(BUCKETS), default="day")
+    args = parser.parse_args()
+
+    report(args.db, args.bucket)
@@ -0,0 +1,162 @@
+import numpy as np
+
+from constants import FIXED_TIMESTEP
+
+
+class Clip:
+    def __init__(self, frames, duration, loop=True, step=FIXED_TIMESTEP):
+        self.frames = tuple(frames)
+        self.loop = loop
+
+        if np.ndim(duration) == 0:
+            duration = [duration] * len(self.frames)
+        ticks = [max(1, round(seconds / step)) for seconds in duration]
+
+        # frame index for every tick of the clip
+        self.table = np.repeat(np.arange(len(self.frames)), ticks)
+        self.table.flags.writeable = False
+
+
+class ClipLibrary:
+    # All clips share one flat table, so any number of cursors can be
+    # advanced together whatever clip each of them is playing.
+
+    def __init__(self):
+        self.names = {}
+        self.clip_names = []
+        self.values = []
+        self.offsets = []
+        self.lengths = []
+        self.loops = []
+        self.table = np.zeros(0, dtype=np.int32)
+
+    def add(self, name, clip):
+        clip_id = len(self.offsets)
+        self.names[name] = clip_id
+        self.clip_names.append(name)
+
+        self.offsets.append(len(self.table))
+        self.lengths.append(len(clip.table))
+        self.loops.append(clip.loop)
+        self.table = np.concatenate((self.table, clip.table + len(self.values)))
+        self.values.extend(clip.frames)
+
+        self.offsets_array = np.array(self.offsets)
+        self.lengths_array = np.array(self.lengths)
+        self.loops_array = np.array(self.loops)
+        return clip_id
+
+    def define(self, name, build):
+        if name not in self.names:
+            return self.add(name, build())
+        return self.names[name]
+
+
+class Animator:
+    def __init__(self, library, size=0):
+        self.library = library
+
+        self.clip = np.zeros(size, dtype=np.int16)
+        self.tick = np.zeros(size, dtype=np.int32)
+        self.frame = np.full(size, -1, dtype=np.int32)
+        self.playing = np.zeros(size, dtype=bool)
+
+    def __len__(self):
+        return len(self.clip)
+
+    def add(self, count):
+        first = len(self)
+        self.clip = np.concatenate((self.clip, np.zeros(count, dtype=np.int16)))
+        self.tick = np.concatenate((self.tick, np.zeros(count, dtype=np.int32)))
+        self.frame = np.concatenate((self.frame, np.full(count, -1, dtype=np.int32)))
+        self.playing = np.concatenate((self.playing, np.zeros(count, dtype=bool)))
+        return np.arange(first, len(self))
+
+    def keep(self, rows):
+        self.clip = self.clip[rows]
+        self.tick = self.tick[rows]
+        self.frame = self.frame[rows]
+        self.playing = self.playing[rows]
+
+    def clear(self):
+        self.keep(np.zeros(len(self), dtype=bool))
+
+    def play(self, rows, clip_id, tick=0):
+        library = self.library
+        tick = np.minimum(tick, library.lengths[clip_id] - 1)
+
+        self.clip[rows] = clip_id
+        self.tick[rows] = tick
+        self.frame[rows] = library.table[library.offsets[clip_id] + tick]
+        self.playing[rows] = True
+
+    def advance(self, steps=1):
+        # returns the cursors that now show another frame and the ones
+        # whose clip ran out; stopped cursors are left as they are
+        library = self.library
+        rows = np.flatnonzero(self.playing)
+        if len(rows) == 0:
+            return rows, rows
+
+        clip = self.clip[rows]
+        length = library.lengths_array[clip]
+        loop = library.loops_array[clip]
+
+        tick = self.tick[rows] + steps
+        done = ~loop & (tick >= length)
+        tick = np.where(loop, tick % length, np.minimum(tick, length - 1))
+        self.tick[rows] = tick
+
+        frame = library.table[library.offsets_array[clip] + tick]
+        changed = frame != self.frame[rows]
+        self.frame[rows] = frame
+
+        finished = rows[done]
+        self.playing[finished] = False
+        return rows[changed], finished
+
+    def write_state(self, writer):
+        # clip ids and frame indices depend on the order this process
+        # registered its clips in, so clips are stored by name and the
+        # frame is found again from the tick
+        played = self.frame >= 0
+        used = np.unique(self.clip[played])
+        writer.text("\n".join(self.library.clip_names[clip_id] for clip_id in used.tolist()))
+
+        writer.array(np.where(played, np.searchsorted(used, self.clip), -1).astype(np.int16))
+        writer.array(self.tick)
+        writer.array(self.playing)
+
+    def read_state(self, reader):
+        library = self.library
+        names = reader.text()
+        try:
+            ids = np.array(
+                [library.names[name] for name in names.split("\n")] if names else [],
+                dtype=np.int16
+            )
+        except KeyError as error:
+            raise ValueError(f"unknown animation clip {error}")
+
+        index = reader.array(np.int16)
+        played = index >= 0
+        self.tick = reader.array(np.int32).copy()
+        self.playing = reader.array(bool).copy()
+
+        self.clip = np.zeros(len(index), dtype=np.int16)
+        self.clip[played] = ids[index[played]]
+        self.frame = np.full(len(index), -1, dtype=np.int32)
+        if played.any():
+            self.frame[played] = library.table[
+                library.offsets_array[self.clip[played]] + self.tick[played]
+            ]
+
+    def current(self, row):
+        return self.library.values[self.frame[row]]
+
+    def values(self, rows):
+        values = self.library.values
+        return [values[frame] for frame in self.frame[rows].tolist()]
+
+
+clips = ClipLibrary()
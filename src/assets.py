@@ -0,0 +1,108 @@
+import threading
+import time
+
+import arcade
+
+
+PLAYER_IMAGE = "images/6f5a2da7e8e897eb91dd2771070e6918{}.png"
+
+SPRITES = {
+    "player_idle": PLAYER_IMAGE.format(""),
+    "player_down_0": PLAYER_IMAGE.format(" (1)"),
+    "player_down_1": PLAYER_IMAGE.format(" (2)"),
+    "player_left_0": PLAYER_IMAGE.format(" (3)"),
+    "player_left_1": PLAYER_IMAGE.format(" (4)"),
+    "player_right_0": PLAYER_IMAGE.format(" (5)"),
+    "player_right_1": PLAYER_IMAGE.format(" (6)"),
+    "player_up_0": PLAYER_IMAGE.format(" (7)"),
+    "player_up_1": PLAYER_IMAGE.format(" (8)"),
+    "particle_0": "images/chastitsa.png",
+    "particle_1": "images/chastitsa(1).png",
+    "particle_2": "images/chastitsa(2).png",
+    "particle_3": "images/chastitsa(3).png",
+    "particle_4": "images/chastitsa(4).png",
+    "particle_5": "images/chastitsa(5).png",
+    "particle_6": "images/chastitsa(6).png",
+    "bullet": "images/bullet.png",
+    "pear": "images/grusha.png",
+    "rock_0": "images/kamen.jpg",
+    "rock_1": "images/kamen(1).jpg",
+    "rock_2": "images/kamen(2).jpg",
+}
+
+BACKGROUNDS = {
+    "start": "images/start.jpg",
+    "first": "images/firstmap.jpg",
+    "second": "images/secondmap.jpg",
+    "third": "images/thirdmap.jpg",
+}
+
+PARTICLE_FRAMES = 7
+
+
+class AssetManager:
+    def __init__(self):
+        self.textures = {}
+        self.lock = threading.Lock()
+        self.loaded = False
+        self.load_time = 0
+        self.atlas_time = 0
+
+    def load(self):
+        if self.loaded:
+            return
+
+        # backgrounds are large and only needed room by room, they are
+        # decoded on demand or ahead of time by the room preloader
+        start = time.perf_counter()
+        for name, path in SPRITES.items():
+            self.textures[name] = arcade.load_texture(path)
+
+        self.loaded = True
+        self.load_time = time.perf_counter() - start
+
+    def texture(self, name):
+        if not self.loaded:
+            self.load()
+
+        texture = self.textures.get(name)
+        if texture is None:
+            texture = self.decode(name)
+        return texture
+
+    def decode(self, name):
+        # only reads the image, so it may run on any thread
+        with self.lock:
+            texture = self.textures.get(name)
+            if texture is None:
+                texture = arcade.load_texture(BACKGROUNDS[name])
+                self.textures[name] = texture
+        return texture
+
+    def walk_frames(self, direction):
+        return [self.texture(f"player_{direction}_{i}") for i in range(2)]
+
+    def particle_frames(self):
+        return [self.texture(f"particle_{i}") for i in range(PARTICLE_FRAMES)]
+
+    def build_atlas(self, ctx):
+        # Every SpriteList draws from the default atlas, so packing the
+        # small sprites there up front means no upload happens mid-game.
+        self.load()
+
+        start = time.perf_counter()
+        atlas = ctx.default_atlas
+        for name in SPRITES:
+            atlas.add(self.textures[name])
+
+        self.atlas_time = time.perf_counter() - start
+        return atlas
+
+    def report(self):
+        return (
+            f"{len(self.textures)} текстур загружено за {self.load_time * 1000:.1f} мс, "
+            f"атлас собран за {self.atlas_time * 1000:.1f} мс"
+        )
+
+
+assets = AssetManager()
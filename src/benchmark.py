@@ -0,0 +1,242 @@
+import argparse
+import contextlib
+import json
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+if "DISPLAY" not in os.environ:
+    os.environ.setdefault("ARCADE_HEADLESS", "1")
+
+import arcade
+
+from constants import (
+    SCREEN_WIDTH, SCREEN_HEIGHT, SCREEN_TITLE,
+    MAP_LEFT, MAP_RIGHT, MAP_BOTTOM, MAP_TOP,
+    FIXED_TIMESTEP,
+)
+from ISAAC import GameView
+
+
+BASELINE_PATH = "benchmark_baseline.json"
+BENCH_TICKS = 600
+BENCH_WARMUP = 60
+BENCH_SEED = 1
+REGRESSION_THRESHOLD = 0.2
+
+# scenarios must never end the game, the view would close the window
+INVULNERABLE_HP = 10 ** 9
+
+
+class Scenario:
+    name = ""
+    floor_size = 0
+
+    def setup(self, view):
+        view.sim.player_hp = INVULNERABLE_HP
+        self.rng = random.Random(view.sim.seed)
+
+    def drive(self, view, tick):
+        pass
+
+
+class FourWayFire(Scenario):
+    name = "fire"
+
+    def __init__(self, volleys=4):
+        self.volleys = volleys
+
+    def setup(self, view):
+        super().setup(view)
+        view.sim.enemies.clear()
+
+    def drive(self, view, tick):
+        sim = view.sim
+        sim.room_transition_cooldown = 1
+
+        for _ in range(self.volleys):
+            sim.player.center_x = self.rng.uniform(MAP_LEFT, MAP_RIGHT)
+            sim.player.center_y = self.rng.uniform(MAP_BOTTOM, MAP_TOP)
+            for direction in ("up", "down", "left", "right"):
+                sim.shoot(direction)
+
+
+class PearSwarm(Scenario):
+    name = "pears"
+
+    def __init__(self, count=300):
+        self.count = count
+
+    def setup(self, view):
+        super().setup(view)
+
+        enemies = view.sim.enemies
+        enemies.clear()
+        for _ in range(self.count):
+            enemies.spawn(
+                "pear",
+                self.rng.randint(MAP_LEFT + 40, MAP_RIGHT - 40),
+                self.rng.randint(MAP_BOTTOM + 40, MAP_TOP - 40)
+            )
+
+
+class RoomPingPong(Scenario):
+    name = "rooms"
+    floor_size = 12
+
+    def drive(self, view, tick):
+        sim = view.sim
+        if sim.room_transition_cooldown > 0:
+            return
+
+        door = sim.room.exits[tick % len(sim.room.exits)]
+        sim.player.center_x = (door.left + door.right) / 2
+        sim.player.center_y = (door.bottom + door.top) / 2
+
+
+class ParticleStorm(Scenario):
+    name = "particles"
+
+    def __init__(self, per_tick=16):
+        self.per_tick = per_tick
+
+    def drive(self, view, tick):
+        for i in range(self.per_tick):
+            view.spawn_explosion(
+                self.rng.uniform(MAP_LEFT, MAP_RIGHT),
+                self.rng.uniform(MAP_BOTTOM, MAP_TOP),
+                strong=i % 2 == 0
+            )
+
+
+SCENARIOS = {
+    scenario.name: scenario
+    for scenario in (FourWayFire, PearSwarm, RoomPingPong, ParticleStorm)
+}
+
+
+def play(scenario, ticks, warmup, seed):
+    # the benchmark must not touch the results database
+    view = GameView(seed=seed, floor_size=scenario.floor_size, db_path=None)
+    # shed effects would make runs incomparable
+    view.governor.enabled = False
+    view.setup()
+    scenario.setup(view)
+
+    # the game prints every hit, terminal output must not be timed
+    times = []
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        for tick in range(warmup + ticks):
+            scenario.drive(view, tick)
+
+            start = time.perf_counter()
+            view.on_update(FIXED_TIMESTEP)
+            elapsed = time.perf_counter() - start
+
+            if tick >= warmup:
+                times.append(elapsed)
+
+    view.close_session()
+    return times
+
+
+def run_scenario(scenario, ticks=BENCH_TICKS, warmup=BENCH_WARMUP, seed=BENCH_SEED):
+    times = np.array(play(scenario, ticks, warmup, seed))
+
+    # tracemalloc slows everything down, so memory gets its own pass
+    tracemalloc.start()
+    play(scenario, ticks, warmup, seed)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    return {
+        "ticks": len(times),
+        "ticks_per_sec": round(len(times) / max(times.sum(), 1e-9), 1),
+        "p99_ms": round(float(np.percentile(times, 99)) * 1000, 3),
+        "peak_kb": round(peak / 1024, 1),
+    }
+
+
+def load_baseline(path):
+    if not os.path.exists(path):
+        return {}
+
+    with open(path, encoding="utf-8") as file:
+        return json.load(file)
+
+
+def save_baseline(path, results):
+    baseline = load_baseline(path)
+    baseline.update(results)
+
+    with open(path, "w", encoding="utf-8") as file:
+        json.dump(baseline, file, indent=2, sort_keys=True)
+
+
+def compare(results, baseline, threshold=REGRESSION_THRESHOLD):
+    regressions = []
+    for name, result in results.items():
+        base = baseline.get(name)
+        if base is None:
+            continue
+
+        if result["ticks_per_sec"] < base["ticks_per_sec"] * (1 - threshold):
+            regressions.append(f"{name}: ticks/s {base['ticks_per_sec']} -> {result['ticks_per_sec']}")
+        if result["p99_ms"] > base["p99_ms"] * (1 + threshold):
+            regressions.append(f"{name}: p99 {base['p99_ms']} ms -> {result['p99_ms']} ms")
+        if result["peak_kb"] > base["peak_kb"] * (1 + threshold):
+            regressions.append(f"{name}: peak {base['peak_kb']} KB -> {result['peak_kb']} KB")
+
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("scenarios", nargs="*", metavar="SCENARIO",
+                        help=f"any of: {', '.join(SCENARIOS)} (default: all)")
+    parser.add_argument("--ticks", type=int, default=BENCH_TICKS)
+    parser.add_argument("--warmup", type=int, default=BENCH_WARMUP)
+    parser.add_argument("--seed", type=int, default=BENCH_SEED)
+    parser.add_argument("--baseline", default=BASELINE_PATH, metavar="PATH")
+    parser.add_argument("--threshold", type=float, default=REGRESSION_THRESHOLD,
+                        help="allowed slowdown as a fraction of the baseline")
+    parser.add_argument("--save", action="store_true", help="write the results as the new baseline")
+    args = parser.parse_args()
+
+    for name in args.scenarios:
+        if name not in SCENARIOS:
+            parser.error(f"unknown scenario {name}")
+
+    arcade.Window(SCREEN_WIDTH, SCREEN_HEIGHT, SCREEN_TITLE, visible=False)
+
+    results = {}
+    print(f"{'scenario':<12} {'ticks/s':>9} {'p99 ms':>8} {'peak KB':>9}")
+    for name in args.scenarios or SCENARIOS:
+        result = run_scenario(SCENARIOS[name](), args.ticks, args.warmup, args.seed)
+        results[name] = result
+        print(f"{name:<12} {result['ticks_per_sec']:>9.0f} {result['p99_ms']:>8.2f} {result['peak_kb']:>9.0f}")
+
+    if args.save:
+        save_baseline(args.baseline, results)
+        print(f"Базовые результаты сохранены в {args.baseline}")
+        return
+
+    baseline = load_baseline(args.baseline)
+    if not baseline:
+        print(f"Нет базовых результатов в {args.baseline}, запустите с --save")
+        return
+
+    regressions = compare(results, baseline, args.threshold)
+    for line in regressions:
+        print(f"Регрессия: {line}")
+
+    if regressions:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
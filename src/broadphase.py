@@ -0,0 +1,132 @@
+import numpy as np
+
+
+# below this many pairs a dense test is cheaper than walking the grid
+DENSE_PAIR_LIMIT = 4096
+
+EMPTY_PAIRS = (np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64))
+
+
+def overlap(a, b):
+    return (
+        (a[..., 0] < b[..., 1]) & (a[..., 1] > b[..., 0])
+        & (a[..., 2] < b[..., 3]) & (a[..., 3] > b[..., 2])
+    )
+
+
+def contains(points, boxes):
+    return (
+        (points[..., 0] > boxes[..., 0]) & (points[..., 0] < boxes[..., 1])
+        & (points[..., 1] > boxes[..., 2]) & (points[..., 1] < boxes[..., 3])
+    )
+
+
+class GridLayer:
+    def __init__(self):
+        self.boxes = None
+        self.grown = np.zeros((0, 4))
+        self.ranges = None
+        self.cells = np.zeros(0, dtype=np.int64)
+        self.owners = np.zeros(0, dtype=np.int64)
+
+
+class SpatialGrid:
+    # Bullets all share one hit box, so every obstacle is stored grown by that
+    # box. A bullet then only has to test the single cell under its center,
+    # and each obstacle appears at most once per cell, so pairs never repeat.
+
+    def __init__(self, left, right, bottom, top, cell_size, extents):
+        self.left = left
+        self.bottom = bottom
+        self.cell_size = cell_size
+        self.extents = np.array(extents, dtype=np.float64)
+
+        self.cols = max(1, int(np.ceil((right - left) / cell_size)))
+        self.rows = max(1, int(np.ceil((top - bottom) / cell_size)))
+
+        self.walls = GridLayer()
+        self.enemies = GridLayer()
+
+        self.rebuilt_cells = 0
+
+    def cell_x(self, x):
+        return np.clip((x - self.left) // self.cell_size, 0, self.cols - 1).astype(np.int64)
+
+    def cell_y(self, y):
+        return np.clip((y - self.bottom) // self.cell_size, 0, self.rows - 1).astype(np.int64)
+
+    def grow(self, boxes):
+        left, right, bottom, top = self.extents
+        return boxes - np.array([right, left, top, bottom])
+
+    def update_layer(self, layer, boxes, static=False):
+        if static and layer.boxes is boxes:
+            return
+
+        grown = self.grow(boxes)
+        ranges = np.column_stack((
+            self.cell_x(grown[:, 0]), self.cell_x(grown[:, 1]),
+            self.cell_y(grown[:, 2]), self.cell_y(grown[:, 3]),
+        ))
+
+        layer.boxes = boxes
+        layer.grown = grown
+        if layer.ranges is not None and np.array_equal(ranges, layer.ranges):
+            return
+
+        layer.ranges = ranges
+        if len(ranges) == 0:
+            layer.cells = layer.owners = EMPTY_PAIRS[0]
+            return
+
+        width = ranges[:, 1] - ranges[:, 0] + 1
+        height = ranges[:, 3] - ranges[:, 2] + 1
+        counts = width * height
+        total = int(counts.sum())
+
+        owners = np.repeat(np.arange(len(ranges)), counts)
+        local = np.arange(total) - np.repeat(np.cumsum(counts) - counts, counts)
+        span = width[owners]
+        cells = (ranges[owners, 2] + local // span) * self.cols + ranges[owners, 0] + local % span
+
+        order = np.argsort(cells, kind="stable")
+        layer.cells = cells[order]
+        layer.owners = owners[order]
+        self.rebuilt_cells += total
+
+    def join_points(self, points, layer):
+        if len(points) == 0 or len(layer.grown) == 0:
+            return EMPTY_PAIRS
+
+        if len(points) * len(layer.grown) <= DENSE_PAIR_LIMIT:
+            return np.nonzero(contains(points[:, None], layer.grown[None, :]))
+
+        cells = self.cell_y(points[:, 1]) * self.cols + self.cell_x(points[:, 0])
+        low = np.searchsorted(layer.cells, cells, "left")
+        high = np.searchsorted(layer.cells, cells, "right")
+        counts = high - low
+        total = int(counts.sum())
+        if total == 0:
+            return EMPTY_PAIRS
+
+        first = np.repeat(np.arange(len(points)), counts)
+        offsets = np.arange(total) - np.repeat(np.cumsum(counts) - counts, counts)
+        second = layer.owners[np.repeat(low, counts) + offsets]
+
+        hit = contains(points[first], layer.grown[second])
+        return first[hit], second[hit]
+
+    def query(self, points, wall_boxes, enemy_boxes, player_box):
+        self.update_layer(self.walls, wall_boxes, static=True)
+        self.update_layer(self.enemies, enemy_boxes)
+
+        if len(enemy_boxes):
+            player_enemy = np.nonzero(overlap(player_box[:, None], enemy_boxes[None, :]))
+        else:
+            player_enemy = EMPTY_PAIRS
+
+        return (
+            self.join_points(points, self.walls),
+            self.join_points(points, self.enemies),
+            player_enemy,
+        )
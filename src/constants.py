@@ -0,0 +1,44 @@
+SCREEN_WIDTH = 1000
+SCREEN_HEIGHT = 600
+SCREEN_TITLE = "айзек"
+
+PLAYER_SPEED = 5
+ANIMATION_SPEED = 0.15
+BORDER = 100
+
+BULLET_SPEED = 7
+BULLET_SCALE = 0.7
+BULLET_RANGE = 400
+SHOOT_DELAY = 0.5
+BULLET_POOL_SIZE = 64
+BULLET_WALL_MARGIN = 100
+PROJECTILE_CAPACITY = 256
+
+MAX_PARTICLES = 32
+PARTICLE_FRAME_TIME = 0.05
+
+MAP_LEFT = 100
+MAP_RIGHT = SCREEN_WIDTH - 100
+MAP_BOTTOM = 100
+MAP_TOP = SCREEN_HEIGHT - 50
+
+PLAYER_MAX_HP = 3
+ENEMY_MAX_HP = 3
+PEAR_ACTIVE_TIME = 5.0
+PEAR_REST_TIME = 2.0
+PEAR_MOVE_DELAY = 0.7
+PEAR_SCALE = 0.5
+
+FIXED_TIMESTEP = 1 / 60
+MAX_STEPS_PER_FRAME = 5
+FRAME_BUDGET = 1 / 60
+QUALITY_WINDOW = 60
+REWIND_SECONDS = 5
+
+DB_PATH = "DatabaseIsaac.sqlite"
+
+ROOMS_PATH = "rooms.json"
+QUICKSAVE_PATH = "quicksave.issn"
+FLOOR_LIVE_ROOMS = 8
+PRELOAD_UPLOADS_PER_FRAME = 1
+GRID_CELL_SIZE = 50
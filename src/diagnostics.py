@@ -0,0 +1,151 @@
+import gc
+import json
+import tracemalloc
+from collections import Counter
+
+from profiler import PROFILE_WINDOW, FrameProfiler
+
+
+# live objects of these types are counted at every room change
+WATCHED_TYPES = ("Sprite", "SpriteList", "Texture", "Text", "Clip", "list", "dict")
+# a value that grew on this many room changes in a row is reported
+GROWTH_VISITS = 3
+
+
+def sprite_list_stats(sprite_lists):
+    # sprites in each list and the sprite slots its GPU buffers hold
+    stats = {}
+    for name, sprite_list in sprite_lists.items():
+        stats[f"{name}_sprites"] = len(sprite_list)
+        stats[f"{name}_slots"] = sprite_list._buf_capacity
+    return stats
+
+
+def gpu_stats(ctx):
+    stats = ctx.stats
+    width, height = ctx.default_atlas.size
+    return {
+        "gpu_buffers": stats.buffer[0] - stats.buffer[1],
+        "gpu_textures": stats.texture[0] - stats.texture[1],
+        "atlas_pixels": width * height,
+    }
+
+
+def object_counts():
+    counts = Counter(type(item).__name__ for item in gc.get_objects())
+    return {f"live_{name}": counts[name] for name in WATCHED_TYPES}
+
+
+class MemoryProbe:
+    __slots__ = ("profiler", "name", "timing")
+
+    def __init__(self, profiler, name, timing):
+        self.profiler = profiler
+        self.name = name
+        self.timing = timing
+
+    def __enter__(self):
+        self.profiler.enter()
+        self.timing.__enter__()
+        return self
+
+    def __exit__(self, *exc):
+        self.timing.__exit__(*exc)
+        self.profiler.exit(self.name)
+        return False
+
+
+class MemoryProfiler(FrameProfiler):
+    # Attributes Python allocations to the profiler stages. For every stage
+    # a frame keeps the bytes still held afterwards and the peak reached
+    # inside it; a high peak with a small net is churn freed in the same
+    # frame. Each frame becomes one JSON line of the timeline.
+
+    def __init__(self, path, enabled=False, window=PROFILE_WINDOW):
+        super().__init__(enabled, window)
+
+        self.file = open(path, "w", encoding="utf-8")
+        self.frame = 0
+
+        # [start, peak] of the stages being measured, innermost last
+        self.open = []
+        self.stages = {}
+        self.totals = Counter()
+
+        self.room = None
+        self.last_values = {}
+        self.streaks = Counter()
+        self.growing = {}
+
+        tracemalloc.start()
+
+    def probe(self, name):
+        return MemoryProbe(self, name, super().probe(name))
+
+    def enter(self):
+        current, peak = tracemalloc.get_traced_memory()
+        if self.open:
+            parent = self.open[-1]
+            parent[1] = max(parent[1], peak)
+
+        tracemalloc.reset_peak()
+        self.open.append([current, current])
+
+    def exit(self, name):
+        current, peak = tracemalloc.get_traced_memory()
+        start, inner_peak = self.open.pop()
+        peak = max(peak, inner_peak)
+        if self.open:
+            parent = self.open[-1]
+            parent[1] = max(parent[1], peak)
+
+        stage = self.stages.setdefault(name, [0, 0])
+        stage[0] += current - start
+        stage[1] = max(stage[1], peak - start)
+        self.totals[name] += peak - start
+
+    def end_frame(self, tick, room, values):
+        current, _ = tracemalloc.get_traced_memory()
+        row = {"frame": self.frame, "tick": tick, "room": room, "traced": current}
+        for name, (net, peak) in self.stages.items():
+            row[f"{name}_net"] = net
+            row[f"{name}_peak"] = peak
+        row.update(values)
+
+        self.file.write(json.dumps(row))
+        self.file.write("\n")
+
+        self.stages = {}
+        self.frame += 1
+
+        if room != self.room:
+            self.room = room
+            self.check_growth({"traced": current, **values, **object_counts()})
+
+    def check_growth(self, values):
+        # rooms hold different things, so one rise means little; a value
+        # that rises on every change is what a leak looks like
+        for name, value in values.items():
+            if value > self.last_values.get(name, value):
+                self.streaks[name] += 1
+            else:
+                self.streaks[name] = 0
+
+            if self.streaks[name] >= GROWTH_VISITS:
+                self.growing[name] = value
+            else:
+                self.growing.pop(name, None)
+
+        self.last_values = values
+
+    def close(self):
+        tracemalloc.stop()
+        self.file.close()
+
+        print(f"кадров записано: {self.frame}")
+        print("выделения по этапам (сумма пиков):")
+        for name, total in self.totals.most_common():
+            print(f"  {name:<14} {total / 1024:10.1f} КБ")
+
+        for name, value in self.growing.items():
+            print(f"растёт при смене комнат: {name} = {value}")
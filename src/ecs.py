@@ -0,0 +1,120 @@
+import numpy as np
+
+
+TRANSFORM = np.dtype([("pos", "<f8", (2,))])
+VELOCITY = np.dtype([("vel", "<f8", (2,))])
+# where a projectile started, its range is measured from there
+LIFETIME = np.dtype([("origin", "<f8", (2,))])
+HEALTH = np.dtype([("hp", "<i8"), ("hit_timer", "<f8")])
+AI = np.dtype([("state", "u1"), ("state_timer", "<f8"), ("move_timer", "<f8")])
+# what the sprite shows, kept so snapshots restore it exactly
+LOOK = np.dtype([("scale", "<f8"), ("flashing", "?")])
+
+
+class ComponentTable:
+    # One component stored column by column: every field is its own
+    # contiguous array, so systems work on whole columns at once.
+
+    def __init__(self, dtype, size=0):
+        self.dtype = dtype
+        self.fields = dtype.names
+
+        for field in self.fields:
+            base, shape = self.layout(field)
+            setattr(self, field, np.zeros((size, *shape), dtype=base))
+
+    def __len__(self):
+        return len(getattr(self, self.fields[0]))
+
+    def layout(self, field):
+        field_dtype = self.dtype.fields[field][0]
+        return field_dtype.base, field_dtype.shape
+
+    def resize(self, size):
+        old = len(self)
+        for field in self.fields:
+            column = getattr(self, field)
+            column = np.resize(column, (size, *column.shape[1:]))
+            column[old:] = 0
+            setattr(self, field, column)
+
+    def append(self, records):
+        for field in self.fields:
+            column = getattr(self, field)
+            setattr(self, field, np.concatenate((column, records[field])))
+
+    def keep(self, rows):
+        for field in self.fields:
+            setattr(self, field, getattr(self, field)[rows])
+
+    def fill(self, records):
+        for field in self.fields:
+            records[field] = getattr(self, field)
+
+    def write_state(self, writer):
+        for field in self.fields:
+            writer.array(getattr(self, field))
+
+    def read_state(self, reader):
+        for field in self.fields:
+            base, shape = self.layout(field)
+            setattr(self, field, reader.array(base, (-1, *shape)).copy())
+
+
+class EntityStore:
+    # Dense entity rows shared by a set of component tables: row i of every
+    # table belongs to the same entity. Removing entities is one mask
+    # applied to every table, and the order of the survivors is kept.
+
+    def __init__(self, **components):
+        self.tables = {}
+        fields = [("kind", "u1")]
+        for name, dtype in components.items():
+            table = ComponentTable(dtype)
+            self.tables[name] = table
+            setattr(self, name, table)
+            fields.extend(dtype.descr)
+
+        self.kind = np.zeros(0, dtype=np.uint8)
+        # one entity with every component, used for room saves
+        self.record = np.dtype(fields)
+
+    def __len__(self):
+        return len(self.kind)
+
+    def records(self, count=1):
+        return np.zeros(count, dtype=self.record)
+
+    def append(self, records):
+        self.kind = np.concatenate((self.kind, records["kind"]))
+        for table in self.tables.values():
+            table.append(records)
+        return np.arange(len(self) - len(records), len(self))
+
+    def keep(self, rows):
+        self.kind = self.kind[rows]
+        for table in self.tables.values():
+            table.keep(rows)
+
+    def clear(self):
+        self.keep(np.zeros(len(self), dtype=bool))
+
+    def pack(self):
+        records = self.records(len(self))
+        records["kind"] = self.kind
+        for table in self.tables.values():
+            table.fill(records)
+        return records.tobytes()
+
+    def unpack(self, data):
+        return np.frombuffer(data, dtype=self.record)
+
+    def write_state(self, writer):
+        writer.array(self.kind)
+        for table in self.tables.values():
+            table.write_state(writer)
+
+    def read_state(self, reader):
+        self.kind = reader.array(np.uint8).copy()
+        for table in self.tables.values():
+            table.read_state(reader)
@@ -0,0 +1,257 @@
+import struct
+
+import arcade
+import numpy as np
+
+from animation import Animator, Clip, clips
+from assets import assets
+from constants import (
+    MAP_LEFT, MAP_RIGHT, MAP_BOTTOM, MAP_TOP,
+    ENEMY_MAX_HP, PEAR_SCALE,
+    PEAR_ACTIVE_TIME, PEAR_REST_TIME, PEAR_MOVE_DELAY,
+    FIXED_TIMESTEP,
+)
+from ecs import AI, HEALTH, LOOK, TRANSFORM, EntityStore
+
+
+ACTIVE = 0
+REST = 1
+
+# PCG64 state, increment, has_uint32, uinteger
+RNG_STATE = struct.Struct("<16s16sBI")
+
+HIT_COLOR = arcade.color.RED_ORANGE
+HIT_ALPHA = 180
+
+# a new enemy type is a new entry here, not a new class
+ENEMY_KINDS = {
+    "pear": {"texture": "pear", "scale": PEAR_SCALE, "hp": ENEMY_MAX_HP},
+}
+ENEMY_NAMES = list(ENEMY_KINDS)
+
+
+def enemy_sprite(kind, x, y, scale):
+    texture = assets.texture(ENEMY_KINDS[ENEMY_NAMES[kind]]["texture"])
+    return arcade.Sprite(texture, scale=scale, center_x=x, center_y=y)
+
+
+def pear_pulse():
+    ticks = np.arange(round(PEAR_ACTIVE_TIME / FIXED_TIMESTEP) + 1)
+    scales = PEAR_SCALE + np.sin(ticks * FIXED_TIMESTEP * 6) * 0.05
+    return Clip(scales.tolist(), FIXED_TIMESTEP, loop=False)
+
+
+class EnemyManager:
+    # Enemy state lives in the component tables of an entity store and the
+    # sprites are only views of it: a step advances every pear at once and
+    # then touches just the sprite properties that actually changed.
+
+    def __init__(self, seed):
+        self.rng = np.random.default_rng(seed)
+        self.sprite_list = arcade.SpriteList()
+        self.sprites = []
+
+        self.store = EntityStore(transform=TRANSFORM, look=LOOK, health=HEALTH, ai=AI)
+        self.transform = self.store.transform
+        self.look = self.store.look
+        self.health = self.store.health
+        self.ai = self.store.ai
+
+        # scale clips, one per state
+        self.state_clips = [
+            clips.define("pear_active", pear_pulse),
+            clips.define("pear_rest", lambda: Clip([PEAR_SCALE], PEAR_REST_TIME)),
+        ]
+        self.animator = Animator(clips)
+
+        # left, right, bottom, top of each kind at scale 1
+        self.extents = np.array([self.kind_extents(kind) for kind in range(len(ENEMY_NAMES))])
+
+        self.clear()
+
+    def __len__(self):
+        return len(self.store)
+
+    def kind_extents(self, kind):
+        sprite = enemy_sprite(kind, 0, 0, 1)
+        return sprite.left, sprite.right, sprite.bottom, sprite.top
+
+    def spawn(self, name, x, y):
+        kind = ENEMY_KINDS[name]
+        records = self.store.records()
+        records["kind"] = ENEMY_NAMES.index(name)
+        records["pos"] = x, y
+        records["scale"] = kind["scale"]
+        records["hp"] = kind["hp"]
+        records["state"] = ACTIVE
+        self.append(records)
+
+    def append(self, records):
+        rows = self.store.append(records)
+        self.animator.add(len(records))
+
+        ticks = np.round(records["state_timer"] / FIXED_TIMESTEP).astype(np.int32)
+        for state, clip in enumerate(self.state_clips):
+            mask = records["state"] == state
+            self.animator.play(rows[mask], clip, ticks[mask])
+        self.look.scale[rows] = self.animator.values(rows)
+
+        self.create_sprites(rows)
+
+    def create_sprites(self, rows):
+        pos = self.transform.pos
+        scale = self.look.scale
+        flashing = self.look.flashing
+
+        for i in rows.tolist():
+            sprite = enemy_sprite(self.store.kind[i], *pos[i].tolist(), float(scale[i]))
+            if flashing[i]:
+                sprite.color = HIT_COLOR
+                sprite.alpha = HIT_ALPHA
+            self.sprites.append(sprite)
+            self.sprite_list.append(sprite)
+
+    def clear(self):
+        self.sprite_list.clear()
+        self.sprites = []
+        self.animator.clear()
+        self.store.clear()
+
+    def pack(self):
+        return self.store.pack()
+
+    def unpack(self, data):
+        self.clear()
+        self.append(self.store.unpack(data))
+
+    def write_state(self, writer):
+        state = self.rng.bit_generator.state
+        writer.pack(
+            RNG_STATE,
+            state["state"]["state"].to_bytes(16, "little"),
+            state["state"]["inc"].to_bytes(16, "little"),
+            state["has_uint32"],
+            state["uinteger"]
+        )
+
+        self.store.write_state(writer)
+        self.animator.write_state(writer)
+
+    def read_state(self, reader):
+        rng_state, inc, has_uint32, uinteger = reader.unpack(RNG_STATE)
+        self.rng.bit_generator.state = {
+            "bit_generator": "PCG64",
+            "state": {
+                "state": int.from_bytes(rng_state, "little"),
+                "inc": int.from_bytes(inc, "little"),
+            },
+            "has_uint32": has_uint32,
+            "uinteger": uinteger,
+        }
+
+        self.clear()
+        self.store.read_state(reader)
+        self.animator.read_state(reader)
+
+        self.create_sprites(np.arange(len(self)))
+
+    def boxes(self):
+        extents = self.extents[self.store.kind] * self.look.scale[:, None]
+        return extents + np.repeat(self.transform.pos, 2, axis=1)
+
+    def jitter(self, rows):
+        count = np.count_nonzero(rows)
+        if count:
+            self.transform.pos[rows] += self.rng.integers(-2, 3, (count, 2))
+
+    def update(self, delta_time):
+        if not len(self):
+            return
+
+        pos = self.transform.pos
+        ai = self.ai
+        health = self.health
+
+        ai.state_timer += delta_time
+        ai.move_timer += delta_time
+
+        active = ai.state == ACTIVE
+
+        move = active & (ai.move_timer >= PEAR_MOVE_DELAY)
+        count = np.count_nonzero(move)
+        if count:
+            ai.move_timer[move] = 0
+            pos[move, 0] = self.rng.integers(MAP_LEFT + 30, MAP_RIGHT - 30, count, endpoint=True)
+            pos[move, 1] = self.rng.integers(MAP_BOTTOM + 30, MAP_TOP - 30, count, endpoint=True)
+
+        tired = active & (ai.state_timer >= PEAR_ACTIVE_TIME)
+        ai.state[tired] = REST
+        ai.state_timer[tired] = 0
+        ai.move_timer[tired] = 0
+
+        rested = ~active & (ai.state_timer >= PEAR_REST_TIME)
+        ai.state[rested] = ACTIVE
+        ai.state_timer[rested] = 0
+
+        hit = health.hit_timer > 0
+        health.hit_timer[hit] -= delta_time
+        self.jitter(hit)
+
+        near = ai.move_timer > PEAR_MOVE_DELAY - 0.3
+        self.jitter(near)
+
+        scaled, _ = self.animator.advance()
+        restarted = np.flatnonzero(tired | rested)
+        if len(restarted):
+            for state, clip in enumerate(self.state_clips):
+                rows = restarted[ai.state[restarted] == state]
+                self.animator.play(rows, clip)
+            scaled = np.union1d(scaled, restarted)
+        self.look.scale[scaled] = self.animator.values(scaled)
+
+        self.write_back(move | hit | near, scaled, hit)
+
+    def write_back(self, moved, scaled, hit):
+        sprites = self.sprites
+
+        rows = np.flatnonzero(moved)
+        for i, position in zip(rows.tolist(), self.transform.pos[rows].tolist()):
+            sprites[i].position = position
+
+        for i, scale in zip(scaled.tolist(), self.look.scale[scaled].tolist()):
+            sprites[i].scale = scale
+
+        rows = np.flatnonzero(hit != self.look.flashing)
+        for i in rows.tolist():
+            if hit[i]:
+                sprites[i].color = HIT_COLOR
+                sprites[i].alpha = HIT_ALPHA
+            else:
+                sprites[i].color = arcade.color.WHITE
+        self.look.flashing = hit
+
+    def rest(self, i):
+        self.ai.state[i] = REST
+        self.ai.state_timer[i] = 0
+
+        self.animator.play(i, self.state_clips[REST])
+        self.look.scale[i] = PEAR_SCALE
+        self.sprites[i].scale = PEAR_SCALE
+
+    def hit(self, i):
+        self.health.hp[i] -= 1
+        self.health.hit_timer[i] = 0.3
+        return self.health.hp[i] <= 0
+
+    def remove_dead(self):
+        dead = self.health.hp <= 0
+        if not dead.any():
+            return
+
+        for i in np.flatnonzero(dead).tolist():
+            self.sprites[i].remove_from_sprite_lists()
+
+        keep = ~dead
+        self.sprites = [sprite for sprite, alive in zip(self.sprites, keep.tolist()) if alive]
+        self.store.keep(keep)
+        self.animator.keep(keep)
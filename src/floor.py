@@ -0,0 +1,130 @@
+import random
+from collections import OrderedDict
+
+from constants import FLOOR_LIVE_ROOMS, ROOMS_PATH
+from rooms import Exit, Room, RoomGraph, load_room_data, parse_room
+
+
+DIRECTIONS = {
+    "right": (1, 0),
+    "left": (-1, 0),
+    "top": (0, 1),
+    "bottom": (0, -1),
+}
+
+
+def room_name(cell):
+    return f"{cell[0]}_{cell[1]}"
+
+
+def generate_layout(rng, room_count):
+    # Isaac-style growth: a new cell may only touch one existing room,
+    # which keeps the floor branching instead of filling into a blob.
+    cells = [(0, 0)]
+    taken = {(0, 0)}
+    frontier = [(0, 0)]
+    directions = list(DIRECTIONS.values())
+
+    while len(cells) < room_count:
+        if not frontier:
+            frontier = cells[:]
+            rng.shuffle(frontier)
+
+        x, y = frontier.pop(0)
+        rng.shuffle(directions)
+
+        for dx, dy in directions:
+            cell = (x + dx, y + dy)
+            if cell in taken:
+                continue
+
+            neighbours = sum(
+                (cell[0] + nx, cell[1] + ny) in taken
+                for nx, ny in DIRECTIONS.values()
+            )
+            if neighbours > 1 or rng.random() < 0.5:
+                continue
+
+            taken.add(cell)
+            cells.append(cell)
+            frontier.append(cell)
+
+            if len(cells) == room_count:
+                break
+
+    return cells
+
+
+class FloorGraph(RoomGraph):
+    persistent = True
+
+    def __init__(self, start, rooms, live_limit=FLOOR_LIVE_ROOMS):
+        super().__init__(start, rooms)
+
+        self.live_limit = live_limit
+        self.live = OrderedDict()
+
+        self.built_count = 0
+        self.evicted_count = 0
+
+    @classmethod
+    def generate(cls, seed, room_count, path=ROOMS_PATH, live_limit=FLOOR_LIVE_ROOMS):
+        data = load_room_data(path)
+        rng = random.Random(seed)
+
+        templates = {name: parse_room(room) for name, room in data["rooms"].items()}
+        start_template = templates[data["start"]]
+        other_templates = [
+            template for name, template in templates.items()
+            if name != data["start"]
+        ]
+
+        cells = generate_layout(rng, room_count)
+        taken = set(cells)
+
+        rooms = {}
+        for cell in cells:
+            template = start_template if cell == (0, 0) else rng.choice(other_templates)
+
+            exits = []
+            for door, (dx, dy) in DIRECTIONS.items():
+                neighbour = (cell[0] + dx, cell[1] + dy)
+                if neighbour in taken:
+                    exits.append(Exit(
+                        data["doors"][door],
+                        room_name(neighbour),
+                        data["arrivals"][door]
+                    ))
+
+            name = room_name(cell)
+            rooms[name] = Room(name, *template, exits)
+
+        return cls(room_name((0, 0)), rooms, live_limit)
+
+    def room(self, name, player):
+        room = self.rooms[name]
+        near = [name] + [room_exit.target for room_exit in room.exits]
+
+        for near_name in near:
+            near_room = self.rooms[near_name]
+            if not near_room.built:
+                # neighbours are only kept when the preloader has already
+                # done the work, the current room is built either way
+                prepared = self.prepared.pop(near_name, None)
+                if prepared is None and near_name != name:
+                    continue
+
+                near_room.build(player, prepared)
+                self.built_count += 1
+
+            self.live[near_name] = near_room
+            self.live.move_to_end(near_name)
+
+        self.live.move_to_end(name)
+
+        while len(self.live) > max(self.live_limit, len(near)):
+            evicted_name, evicted = self.live.popitem(last=False)
+            evicted.evict()
+            self.evicted_count += 1
+
+        return room
@@ -0,0 +1,46 @@
+from collections import deque
+
+import arcade
+
+
+KEY_ACTIONS = {
+    arcade.key.W: "up",
+    arcade.key.S: "down",
+    arcade.key.A: "left",
+    arcade.key.D: "right",
+    arcade.key.UP: "shoot_up",
+    arcade.key.DOWN: "shoot_down",
+    arcade.key.LEFT: "shoot_left",
+    arcade.key.RIGHT: "shoot_right",
+}
+
+
+class InputQueue:
+    # Key events stamped with simulation time in seconds. Every step drains
+    # what happened before the end of its tick, so the frame rate decides
+    # neither when an event lands nor whether a short tap is seen at all.
+
+    def __init__(self):
+        self.events = deque()
+        self.last_time = 0
+
+    def __len__(self):
+        return len(self.events)
+
+    def push(self, time, key, pressed):
+        # stamps never go backwards, a late event joins the newest one
+        time = max(time, self.last_time)
+        self.last_time = time
+        self.events.append((time, key, pressed))
+
+    def drain(self, end):
+        events = self.events
+        while events and events[0][0] < end:
+            time, key, pressed = events.popleft()
+            action = KEY_ACTIONS.get(key)
+            if action is not None:
+                yield time, action, pressed
+
+    def clear(self, time=0):
+        self.events.clear()
+        self.last_time = time
@@ -0,0 +1,170 @@
+import argparse
+import contextlib
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import arcade
+
+from simulation import GameSimulation
+from storage import ResultWriter
+
+
+PLAYTEST_TICKS = 60 * 60
+
+MOVE_KEYS = [arcade.key.W, arcade.key.A, arcade.key.S, arcade.key.D]
+SHOOT_KEYS = [arcade.key.UP, arcade.key.LEFT, arcade.key.DOWN, arcade.key.RIGHT]
+
+
+class Policy:
+    def __init__(self, seed):
+        self.held = set()
+
+    def hold(self, sim, keys):
+        for key in self.held - keys:
+            sim.on_key_release(key)
+        for key in keys - self.held:
+            sim.on_key_press(key)
+        self.held = keys
+
+    def act(self, sim):
+        pass
+
+
+class RandomPolicy(Policy):
+    name = "random"
+
+    def __init__(self, seed, interval=20):
+        super().__init__(seed)
+        self.rng = random.Random(seed)
+        self.interval = interval
+
+    def act(self, sim):
+        if sim.tick % self.interval:
+            return
+
+        keys = set()
+        for choices in (MOVE_KEYS, SHOOT_KEYS):
+            key = self.rng.choice(choices + [None])
+            if key is not None:
+                keys.add(key)
+        self.hold(sim, keys)
+
+
+class SweepPolicy(Policy):
+    # walks a square and turns the gun a quarter every 40 ticks
+    name = "sweep"
+
+    def act(self, sim):
+        if sim.tick % 40:
+            return
+
+        self.hold(sim, {
+            MOVE_KEYS[sim.tick // 150 % 4],
+            SHOOT_KEYS[sim.tick // 40 % 4],
+        })
+
+
+POLICIES = {policy.name: policy for policy in (RandomPolicy, SweepPolicy)}
+
+
+def play_game(seed, policy_name, max_ticks, floor_size):
+    started_at = time.time()
+    sim = GameSimulation(seed=seed, floor_size=floor_size)
+    policy = POLICIES[policy_name](seed)
+
+    while not sim.game_finished and sim.tick < max_ticks:
+        policy.act(sim)
+        sim.step()
+
+    run = sim.run_record()
+    run["started_at"] = started_at
+    return run
+
+
+def play_batch(seeds, policy_name, max_ticks, floor_size):
+    # the game prints every hit, which would flood the terminal from each worker
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        return [play_game(seed, policy_name, max_ticks, floor_size) for seed in seeds]
+
+
+def run_playtest(games, workers=None, policy_name="random", max_ticks=PLAYTEST_TICKS,
+                 floor_size=0, first_seed=0):
+    workers = workers or os.cpu_count()
+    seeds = list(range(first_seed, first_seed + games))
+    chunk = max(1, games // (workers * 4))
+    batches = [seeds[i:i + chunk] for i in range(0, games, chunk)]
+
+    start = time.perf_counter()
+    results = []
+    with ProcessPoolExecutor(workers) as pool:
+        futures = [
+            pool.submit(play_batch, batch, policy_name, max_ticks, floor_size)
+            for batch in batches
+        ]
+        for future in futures:
+            results.extend(future.result())
+
+    return results, time.perf_counter() - start
+
+
+def summarize(results, elapsed):
+    games = len(results)
+    ticks = sum(game["ticks"] for game in results)
+    kill_times = [game["first_kill"] for game in results if game["first_kill"] is not None]
+
+    counts = {}
+    for game in results:
+        counts[game["result"]] = counts.get(game["result"], 0) + 1
+
+    return {
+        "games": games,
+        "results": counts,
+        "win_rate": counts.get("win", 0) / max(games, 1),
+        "mean_damage": sum(game["damage"] for game in results) / max(games, 1),
+        "mean_time_to_kill": sum(kill_times) / len(kill_times) if kill_times else None,
+        "games_per_sec": games / max(elapsed, 1e-9),
+        "ticks_per_sec": ticks / max(elapsed, 1e-9),
+    }
+
+
+def save_results(results):
+    writer = ResultWriter()
+    for game in results:
+        writer.save(game)
+    if not writer.close(timeout=60):
+        print(f"Не все результаты сохранены: {writer.error or 'таймаут'}")
+    return writer
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--games", type=int, default=1000)
+    parser.add_argument("--workers", type=int, help="default: one per CPU core")
+    parser.add_argument("--policy", choices=list(POLICIES), default="random")
+    parser.add_argument("--ticks", type=int, default=PLAYTEST_TICKS, help="give up on a game after this many ticks")
+    parser.add_argument("--floor", type=int, default=0, metavar="ROOMS", help="play generated floors")
+    parser.add_argument("--first-seed", type=int, default=0)
+    parser.add_argument("--save", action="store_true", help="store every game in the results database")
+    args = parser.parse_args()
+
+    results, elapsed = run_playtest(
+        args.games, args.workers, args.policy, args.ticks, args.floor, args.first_seed
+    )
+    summary = summarize(results, elapsed)
+
+    print(f"{summary['games']} игр за {elapsed:.2f} с "
+          f"({summary['games_per_sec']:.1f} игр/с, {summary['ticks_per_sec']:.0f} тиков/с)")
+    print("результаты: " + ", ".join(f"{name} {count}" for name, count in sorted(summary["results"].items())))
+    print(f"доля побед: {summary['win_rate']:.1%}, средний урон: {summary['mean_damage']:.2f}")
+    if summary["mean_time_to_kill"] is not None:
+        print(f"время до первого убийства: {summary['mean_time_to_kill']:.1f} с")
+
+    if args.save:
+        writer = save_results(results)
+        print(f"Сохранено результатов: {writer.written}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+import math
+import queue
+import threading
+
+from assets import assets
+from constants import PRELOAD_UPLOADS_PER_FRAME
+
+
+STOP = object()
+
+
+def door_distance(room_exit, x, y):
+    return math.hypot(
+        (room_exit.left + room_exit.right) / 2 - x,
+        (room_exit.bottom + room_exit.top) / 2 - y
+    )
+
+
+class RoomPreloader:
+    # A worker thread decodes backgrounds and builds colliders for the rooms
+    # behind the current doors. The main thread only uploads the decoded
+    # textures to the atlas, a few per frame, and the room graph swaps the
+    # prepared colliders in when a door is crossed.
+
+    def __init__(self, rooms, uploads_per_frame=PRELOAD_UPLOADS_PER_FRAME):
+        self.rooms = rooms
+        self.uploads_per_frame = uploads_per_frame
+
+        self.requests = queue.Queue()
+        self.uploads = queue.Queue()
+        self.decoded = set()
+        self.current = None
+
+        self.prepared_count = 0
+        self.uploaded_count = 0
+        self.error = None
+
+        self.thread = threading.Thread(target=self.run, name="RoomPreloader", daemon=True)
+        self.thread.start()
+
+    def update(self, room, x, y, atlas):
+        if room is not self.current:
+            self.current = room
+
+            # the nearest door is the likeliest to be taken next
+            exits = sorted(room.exits, key=lambda room_exit: door_distance(room_exit, x, y))
+            self.requests.put([room_exit.target for room_exit in exits])
+
+        for _ in range(self.uploads_per_frame):
+            try:
+                texture = self.uploads.get_nowait()
+            except queue.Empty:
+                break
+
+            atlas.add(texture)
+            self.uploaded_count += 1
+
+    def close(self):
+        self.requests.put(STOP)
+        self.thread.join()
+        return self.error is None
+
+    def run(self):
+        while True:
+            names = self.requests.get()
+
+            # only the newest prediction matters
+            while not self.requests.empty():
+                names = self.requests.get_nowait()
+
+            if names is STOP:
+                break
+
+            # a bad image or room must not stop preloading for the rest of
+            # the session; the room is then simply built on entry
+            try:
+                self.prepare(names)
+            except Exception as error:
+                self.error = error
+
+    def prepare(self, names):
+        prepared = self.rooms.prepared
+        for name in list(prepared):
+            if name not in names:
+                prepared.pop(name, None)
+
+        for name in names:
+            room = self.rooms.rooms[name]
+            if not room.built and name not in prepared:
+                prepared[name] = room.prepare()
+                self.prepared_count += 1
+
+            if room.background not in self.decoded:
+                self.decoded.add(room.background)
+                self.uploads.put(assets.decode(room.background))
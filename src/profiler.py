@@ -0,0 +1,141 @@
+import csv
+import json
+import time
+from collections import deque
+
+import arcade
+import numpy as np
+
+
+PROFILE_WINDOW = 600
+OVERLAY_REFRESH = 0.5
+
+
+class NullProbe:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+NULL_PROBE = NullProbe()
+
+
+class Probe:
+    __slots__ = ("samples", "start")
+
+    def __init__(self, window):
+        self.samples = deque(maxlen=window)
+        self.start = 0
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.samples.append(time.perf_counter() - self.start)
+        return False
+
+
+class FrameProfiler:
+    def __init__(self, enabled=False, window=PROFILE_WINDOW):
+        self.enabled = enabled
+        self.window = window
+        self.probes = {}
+
+    def probe(self, name):
+        if not self.enabled:
+            return NULL_PROBE
+
+        probe = self.probes.get(name)
+        if probe is None:
+            probe = self.probes[name] = Probe(self.window)
+        return probe
+
+    def stats(self):
+        rows = []
+        for name, probe in self.probes.items():
+            if not probe.samples:
+                continue
+
+            samples = np.fromiter(probe.samples, dtype=np.float64) * 1000
+            p50, p95, p99 = np.percentile(samples, (50, 95, 99))
+            rows.append({
+                "stage": name,
+                "samples": len(samples),
+                "mean_ms": round(float(samples.mean()), 4),
+                "p50_ms": round(float(p50), 4),
+                "p95_ms": round(float(p95), 4),
+                "p99_ms": round(float(p99), 4),
+                "max_ms": round(float(samples.max()), 4),
+            })
+        return rows
+
+    def dump(self, path):
+        rows = self.stats()
+
+        if path.endswith(".json"):
+            with open(path, "w", encoding="utf-8") as file:
+                json.dump(rows, file, indent=2)
+            return
+
+        with open(path, "w", newline="", encoding="utf-8") as file:
+            writer = csv.DictWriter(
+                file,
+                ["stage", "samples", "mean_ms", "p50_ms", "p95_ms", "p99_ms", "max_ms"]
+            )
+            writer.writeheader()
+            writer.writerows(rows)
+
+
+class ProfilerOverlay:
+    def __init__(self, profiler, x=10, y=580):
+        self.profiler = profiler
+        self.x = x
+        self.y = y
+
+        self.visible = False
+        self.timer = 0
+        self.lines = []
+
+    def toggle(self):
+        self.visible = not self.visible
+        self.timer = OVERLAY_REFRESH
+
+    def update(self, delta_time):
+        if not self.visible:
+            return
+
+        self.timer += delta_time
+        if self.timer < OVERLAY_REFRESH:
+            return
+
+        self.timer = 0
+        rows = self.profiler.stats()
+        texts = ["stage            p50    p95    p99 ms"] + [
+            f"{row['stage']:<14} {row['p50_ms']:6.2f} {row['p95_ms']:6.2f} {row['p99_ms']:6.2f}"
+            for row in rows
+        ]
+
+        while len(self.lines) < len(texts):
+            self.lines.append(arcade.Text(
+                "",
+                self.x,
+                self.y - 16 * len(self.lines),
+                arcade.color.YELLOW,
+                11,
+                font_name="Courier New"
+            ))
+
+        for line, text in zip(self.lines, texts):
+            line.text = text
+        for line in self.lines[len(texts):]:
+            line.text = ""
+
+    def draw(self):
+        if not self.visible:
+            return
+
+        for line in self.lines:
+            line.draw()
@@ -0,0 +1,174 @@
+import struct
+
+import numpy as np
+
+from ecs import LIFETIME, TRANSFORM, VELOCITY, ComponentTable
+
+
+# capacity, count, next serial
+PROJECTILE_STATE = struct.Struct("<IIq")
+
+# bullets live in fixed slots, so collision results can keep pointing at
+# them while the step kills some of them
+SLOT = np.dtype([("alive", "?"), ("serial", "<i8")])
+
+
+class ProjectileSystem:
+    def __init__(self, capacity, bullet_range, bounds, screen_size, wall_margin,
+                 extents=(0, 0, 0, 0), sprite_pool=None, sprite_list=None):
+        self.bullet_range = bullet_range
+        self.map_left, self.map_right, self.map_bottom, self.map_top = bounds
+        self.screen_width, self.screen_height = screen_size
+        self.wall_margin = wall_margin
+
+        # left, right, bottom, top of a bullet relative to its center
+        self.extents = np.array(extents, dtype=np.float64)
+
+        self.sprite_pool = sprite_pool
+        self.sprite_list = sprite_list
+
+        self.capacity = 0
+        self.transform = ComponentTable(TRANSFORM)
+        self.velocity = ComponentTable(VELOCITY)
+        self.lifetime = ComponentTable(LIFETIME)
+        self.slots = ComponentTable(SLOT)
+        self.tables = (self.transform, self.velocity, self.lifetime, self.slots)
+        self.sprites = []
+        self.free = []
+
+        self.next_serial = 0
+        self.count = 0
+
+        self.grow(capacity)
+
+    def grow(self, capacity):
+        old = self.capacity
+        for table in self.tables:
+            table.resize(capacity)
+
+        self.sprites.extend([None] * (capacity - old))
+        self.free.extend(range(capacity - 1, old - 1, -1))
+        self.capacity = capacity
+
+    def spawn(self, x, y, vx, vy):
+        if not self.free:
+            self.grow(self.capacity * 2)
+
+        i = self.free.pop()
+        self.transform.pos[i] = x, y
+        self.lifetime.origin[i] = x, y
+        self.velocity.vel[i] = vx, vy
+        self.slots.alive[i] = True
+        self.slots.serial[i] = self.next_serial
+        self.next_serial += 1
+        self.count += 1
+
+        if self.sprite_pool is not None:
+            sprite = self.sprite_pool.acquire(x, y)
+            self.sprites[i] = sprite
+            self.sprite_list.append(sprite)
+
+        return i
+
+    def kill(self, indices):
+        for i in indices:
+            if not self.slots.alive[i]:
+                continue
+
+            self.slots.alive[i] = False
+            self.velocity.vel[i] = 0
+            self.free.append(i)
+            self.count -= 1
+
+            sprite = self.sprites[i]
+            if sprite is not None:
+                self.sprites[i] = None
+                self.sprite_pool.release(sprite)
+
+    def clear(self):
+        self.kill(np.flatnonzero(self.slots.alive).tolist())
+
+    def move(self):
+        if self.count:
+            self.transform.pos += self.velocity.vel
+
+    def live(self):
+        idx = np.flatnonzero(self.slots.alive)
+        return idx, self.transform.pos[idx]
+
+    def resolve_bounds(self):
+        idx, pos = self.live()
+        if len(idx) == 0:
+            return []
+
+        x = pos[:, 0]
+        y = pos[:, 1]
+
+        origin = self.lifetime.origin[idx]
+        distance = np.hypot(x - origin[:, 0], y - origin[:, 1])
+        out_of_screen = (
+            (x < 0) | (x > self.screen_width)
+            | (y < 0) | (y > self.screen_height)
+        )
+        expired = (distance >= self.bullet_range) | out_of_screen
+
+        margin = self.wall_margin
+        strong = (
+            (x < margin) | (x > self.screen_width - margin)
+            | (y < margin) | (y > self.screen_height - margin)
+        )
+
+        rest = ~expired
+        left = rest & (x <= self.map_left)
+        rest &= ~left
+        right = rest & (x >= self.map_right)
+        rest &= ~right
+        bottom = rest & (y <= self.map_bottom)
+        rest &= ~bottom
+        top = rest & (y >= self.map_top)
+        rest &= ~top
+
+        x[left] = self.map_left
+        x[right] = self.map_right
+        y[bottom] = self.map_bottom
+        y[top] = self.map_top
+
+        dead = ~rest
+        if not dead.any():
+            return []
+
+        strong |= ~expired
+        self.kill(idx[dead].tolist())
+        return list(zip(x[dead].tolist(), y[dead].tolist(), strong[dead].tolist()))
+
+    def write_state(self, writer):
+        writer.pack(PROJECTILE_STATE, self.capacity, self.count, self.next_serial)
+        for table in self.tables:
+            table.write_state(writer)
+        writer.array(np.array(self.free, dtype=np.int32))
+
+    def read_state(self, reader):
+        for sprite in self.sprites:
+            if sprite is not None:
+                self.sprite_pool.release(sprite)
+
+        self.capacity, self.count, self.next_serial = reader.unpack(PROJECTILE_STATE)
+        for table in self.tables:
+            table.read_state(reader)
+        self.free = reader.array(np.int32).tolist()
+
+        self.sprites = [None] * self.capacity
+        if self.sprite_pool is not None:
+            for i in np.flatnonzero(self.slots.alive).tolist():
+                sprite = self.sprite_pool.acquire(*self.transform.pos[i].tolist())
+                self.sprites[i] = sprite
+                self.sprite_list.append(sprite)
+
+    def sync(self):
+        if self.sprite_pool is None or not self.count:
+            return
+
+        idx, pos = self.live()
+        sprites = self.sprites
+        for i, x, y in zip(idx.tolist(), pos[:, 0].tolist(), pos[:, 1].tolist()):
+            sprites[i].position = (x, y)
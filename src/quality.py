@@ -0,0 +1,60 @@
+from collections import deque
+
+from constants import FRAME_BUDGET, MAX_PARTICLES, QUALITY_WINDOW
+
+
+# Only cosmetic work is shed. Pear jitter and pulse stay in every tier:
+# they move the collision boxes and draw from the seeded enemy rng.
+QUALITY_TIERS = [
+    {"name": "high", "particles": MAX_PARTICLES, "explosion": "full", "shadow": True},
+    {"name": "medium", "particles": MAX_PARTICLES // 2, "explosion": "full", "shadow": False},
+    {"name": "low", "particles": MAX_PARTICLES // 4, "explosion": "short", "shadow": False},
+    {"name": "minimal", "particles": 0, "explosion": "short", "shadow": False},
+]
+
+# share of the budget the average frame may use before stepping down,
+# and the share it must fall under before stepping back up
+DEGRADE_AT = 0.9
+RESTORE_AT = 0.5
+
+
+class QualityGovernor:
+    # Watches how long update and draw take, averaged over a window of
+    # frames, and moves one tier at a time. The window is refilled after
+    # each change, so a tier is judged on its own frames.
+
+    def __init__(self, budget=FRAME_BUDGET, window=QUALITY_WINDOW):
+        self.budget = budget
+        self.samples = deque(maxlen=window)
+        self.total = 0
+        self.level = 0
+        self.enabled = True
+
+    @property
+    def tier(self):
+        return QUALITY_TIERS[self.level]
+
+    def update(self, frame_time):
+        # returns True when the tier changed
+        if not self.enabled:
+            return False
+
+        if len(self.samples) == self.samples.maxlen:
+            self.total -= self.samples[0]
+        self.samples.append(frame_time)
+        self.total += frame_time
+
+        if len(self.samples) < self.samples.maxlen:
+            return False
+
+        average = self.total / len(self.samples)
+        if average > self.budget * DEGRADE_AT and self.level < len(QUALITY_TIERS) - 1:
+            self.level += 1
+        elif average < self.budget * RESTORE_AT and self.level > 0:
+            self.level -= 1
+        else:
+            return False
+
+        self.samples.clear()
+        self.total = 0
+        return True
@@ -0,0 +1,62 @@
+import bisect
+
+import arcade
+
+from assets import assets
+
+
+LAYER_BACKGROUND = 0
+LAYER_ENEMIES = 10
+LAYER_PLAYER = 20
+LAYER_EFFECTS = 30
+LAYER_HUD = 40
+
+
+class BackgroundLayer:
+    # The room background is a single sprite that only gets a new texture
+    # when the room changes, so nothing is uploaded on ordinary frames.
+
+    def __init__(self, width, height):
+        self.width = width
+        self.height = height
+
+        self.name = None
+        self.sprite = arcade.Sprite(center_x=width / 2, center_y=height / 2)
+        self.sprite_list = arcade.SpriteList(capacity=1)
+        self.sprite_list.append(self.sprite)
+
+    def show(self, name):
+        if name == self.name:
+            return
+
+        self.name = name
+        self.sprite.texture = assets.texture(name)
+        self.sprite.width = self.width
+        self.sprite.height = self.height
+
+    def draw(self):
+        if self.name is not None:
+            self.sprite_list.draw()
+
+
+class SpriteLayer:
+    def __init__(self, *sprite_lists):
+        self.sprite_lists = sprite_lists
+
+    def draw(self):
+        for sprite_list in self.sprite_lists:
+            if len(sprite_list):
+                sprite_list.draw()
+
+
+class Renderer:
+    def __init__(self):
+        self.layers = []
+
+    def add(self, z, name, layer):
+        bisect.insort(self.layers, (z, f"draw_{name}", layer), key=lambda item: item[0])
+
+    def draw(self, probe):
+        for z, probe_name, layer in self.layers:
+            with probe(probe_name):
+                layer.draw()
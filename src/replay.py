@@ -0,0 +1,86 @@
+import struct
+import sys
+import time
+
+from constants import FIXED_TIMESTEP
+from simulation import GameSimulation
+
+
+REPLAY_MAGIC = b"ISRP"
+REPLAY_VERSION = 6
+
+# magic, version, seed, floor size, ticks played
+HEADER = struct.Struct("<4sBQHI")
+# simulation time, key, pressed
+EVENT = struct.Struct("<dIB")
+
+
+class ReplayRecorder:
+    def __init__(self, seed, floor_size=0):
+        self.seed = seed
+        self.floor_size = floor_size
+        self.events = []
+
+    def record(self, time, key, pressed):
+        self.events.append((time, key, pressed))
+
+    def truncate(self, time):
+        self.events = [event for event in self.events if event[0] < time]
+
+    def save(self, path, ticks):
+        # runs usually end with keys still held, so the last event does
+        # not tell where the game stopped
+        data = bytearray(HEADER.pack(REPLAY_MAGIC, REPLAY_VERSION, self.seed, self.floor_size, ticks))
+        for event in self.events:
+            data += EVENT.pack(*event)
+
+        with open(path, "wb") as file:
+            file.write(data)
+
+
+def load_replay(path):
+    with open(path, "rb") as file:
+        data = file.read()
+
+    magic, version, seed, floor_size, ticks = HEADER.unpack_from(data)
+    if magic != REPLAY_MAGIC or version != REPLAY_VERSION:
+        raise ValueError(f"{path} is not a replay file")
+
+    events = [
+        (time, key, bool(pressed))
+        for time, key, pressed in EVENT.iter_unpack(data[HEADER.size:])
+    ]
+    return seed, floor_size, ticks, events
+
+
+def play_replay(seed, events, max_ticks=None, floor_size=0):
+    sim = GameSimulation(seed=seed, floor_size=floor_size)
+    if max_ticks is None:
+        max_ticks = int(events[-1][0] / FIXED_TIMESTEP) + 1 if events else 0
+
+    # the whole recording goes into the input queue up front, each step
+    # takes what belongs to its tick
+    for event in events:
+        sim.push_input(*event)
+
+    sim.run(max_ticks)
+    return sim
+
+
+def run_replay(path, max_ticks=None):
+    seed, floor_size, ticks, events = load_replay(path)
+    if max_ticks is None:
+        max_ticks = ticks
+
+    start = time.perf_counter()
+    sim = play_replay(seed, events, max_ticks, floor_size)
+    elapsed = time.perf_counter() - start
+
+    print(f"seed {seed}, {len(events)} events, {sim.tick} ticks in {elapsed:.3f} s "
+          f"({sim.tick / max(elapsed, 1e-9):.0f} ticks/s)")
+    print(f"result: {sim.result}, hp: {sim.player_hp}, killed: {sim.killed_pears}")
+    return sim
+
+
+if __name__ == "__main__":
+    run_replay(sys.argv[1], int(sys.argv[2]) if len(sys.argv) > 2 else None)
@@ -0,0 +1,129 @@
+import json
+
+import arcade
+import numpy as np
+
+from constants import ROOMS_PATH
+
+
+class Collider(arcade.Sprite):
+    def __init__(self, x, y, width, height):
+        super().__init__()
+
+        self.texture = arcade.make_soft_square_texture(
+            1, arcade.color.WHITE, 0, 0
+        )
+
+        self.scale_x = width
+        self.scale_y = height
+
+        self.center_x = x
+        self.center_y = y
+
+
+class Exit:
+    def __init__(self, rect, target, spawn):
+        x, y, width, height = rect
+        self.left = x - width / 2
+        self.right = x + width / 2
+        self.bottom = y - height / 2
+        self.top = y + height / 2
+
+        self.target = target
+        self.spawn = tuple(spawn)
+
+    def contains(self, x, y):
+        return self.left <= x <= self.right and self.bottom <= y <= self.top
+
+
+class Room:
+    def __init__(self, name, background, colliders, spawns, exits):
+        self.name = name
+        self.background = background
+        self.colliders = colliders
+        self.spawns = spawns
+        self.exits = exits
+
+        self.wall_list = None
+        self.wall_boxes = None
+        self.physics_engine = None
+
+        # packed enemy state, kept while the player is elsewhere
+        self.saved_enemies = None
+
+    @property
+    def built(self):
+        return self.wall_list is not None
+
+    def prepare(self):
+        # safe off the main thread: the wall list is never drawn, so it
+        # stays lazy and no GL object is created for it
+        wall_list = arcade.SpriteList(use_spatial_hash=True, lazy=True)
+        for x, y, width, height in self.colliders:
+            wall_list.append(Collider(x, y, width, height))
+
+        wall_boxes = np.array(
+            [[w.left, w.right, w.bottom, w.top] for w in wall_list]
+        ).reshape(-1, 4)
+        return wall_list, wall_boxes
+
+    def build(self, player, prepared=None):
+        self.wall_list, self.wall_boxes = prepared or self.prepare()
+        self.physics_engine = arcade.PhysicsEngineSimple(player, self.wall_list)
+
+    def evict(self):
+        self.wall_list = None
+        self.wall_boxes = None
+        self.physics_engine = None
+
+    def exit_at(self, x, y):
+        for room_exit in self.exits:
+            if room_exit.contains(x, y):
+                return room_exit
+        return None
+
+
+def load_room_data(path=ROOMS_PATH):
+    with open(path, encoding="utf-8") as file:
+        return json.load(file)
+
+
+def parse_room(room):
+    return (
+        room["background"],
+        [tuple(collider) for collider in room["colliders"]],
+        [(item["enemy"], item["count"]) for item in room["spawns"]],
+    )
+
+
+class RoomGraph:
+    # rooms keep their enemies between visits
+    persistent = False
+
+    def __init__(self, start, rooms):
+        self.start = start
+        self.rooms = rooms
+
+        # colliders built ahead of time by the preloader
+        self.prepared = {}
+
+    @classmethod
+    def load(cls, path=ROOMS_PATH):
+        data = load_room_data(path)
+
+        doors = data["doors"]
+        rooms = {}
+        for name, room in data["rooms"].items():
+            exits = [
+                Exit(doors[item["door"]], item["to"], item["spawn"])
+                for item in room["exits"]
+            ]
+            rooms[name] = Room(name, *parse_room(room), exits)
+
+        return cls(data["start"], rooms)
+
+    def room(self, name, player):
+        room = self.rooms[name]
+        if not room.built:
+            room.build(player, self.prepared.pop(name, None))
+        return room
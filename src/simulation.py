@@ -0,0 +1,512 @@
+import arcade
+import random
+import struct
+
+import numpy as np
+
+from animation import Animator, Clip, clips
+from assets import assets
+from broadphase import SpatialGrid
+from constants import (
+    SCREEN_WIDTH, SCREEN_HEIGHT,
+    PLAYER_SPEED, ANIMATION_SPEED, BORDER,
+    BULLET_SPEED, BULLET_SCALE, BULLET_RANGE, SHOOT_DELAY,
+    BULLET_WALL_MARGIN, PROJECTILE_CAPACITY,
+    MAP_LEFT, MAP_RIGHT, MAP_BOTTOM, MAP_TOP,
+    PLAYER_MAX_HP,
+    FIXED_TIMESTEP, GRID_CELL_SIZE,
+)
+from enemies import ACTIVE, EnemyManager
+from profiler import FrameProfiler
+from projectiles import ProjectileSystem
+from floor import FloorGraph
+from inputs import InputQueue
+from rooms import RoomGraph
+from snapshot import (
+    HEADER, SIZE, SNAPSHOT_MAGIC, SNAPSHOT_VERSION,
+    SnapshotReader, SnapshotWriter, read_header,
+)
+
+
+INPUT_FLAGS = (
+    "up", "down", "left", "right",
+    "shoot_up", "shoot_down", "shoot_left", "shoot_right",
+)
+FACINGS = ["down", "up", "left", "right"]
+# in firing priority
+SHOOT_ACTIONS = {
+    "shoot_up": "up",
+    "shoot_down": "down",
+    "shoot_left": "left",
+    "shoot_right": "right",
+}
+
+# player x, y, hp, kills, input flags, facing, next shot time, room cooldown, finished
+SIM_STATE = struct.Struct("<ddiIBBdd?")
+# Mersenne Twister words and position
+RANDOM_STATE = struct.Struct("<625I")
+
+# events that are stored per run; shots and rooms are only summarised
+LOGGED_EVENTS = ("damage", "kill")
+
+
+def bullet_extents():
+    bullet = arcade.Sprite(assets.texture("bullet"), scale=BULLET_SCALE)
+    return bullet.left, bullet.right, bullet.bottom, bullet.top
+
+
+class GameSimulation:
+    def __init__(self, seed=None, sprite_pool=None, sprite_list=None, floor_size=0):
+        if seed is None:
+            seed = random.randrange(2 ** 32)
+
+        # snapshots and replays store the seed as 64 unsigned bits
+        self.seed = seed % 2 ** 64
+        self.rng = random.Random(self.seed)
+        self.profiler = FrameProfiler()
+
+        self.floor_size = floor_size
+        if floor_size:
+            self.rooms = FloorGraph.generate(self.seed, floor_size)
+        else:
+            self.rooms = RoomGraph.load()
+        self.room = None
+        self.current_map = None
+
+        self.wall_list = None
+        self.wall_boxes = None
+        self.physics_engine = None
+
+        self.up = self.down = self.left = self.right = False
+        self.shoot_up = self.shoot_down = False
+        self.shoot_left = self.shoot_right = False
+
+        self.facing = "down"
+        self.input_queue = InputQueue()
+
+        self.idle_clip = clips.define(
+            "player_idle",
+            lambda: Clip([assets.texture("player_idle")], ANIMATION_SPEED)
+        )
+        self.walk_clips = {
+            direction: clips.define(
+                f"player_walk_{direction}",
+                lambda direction=direction: Clip(assets.walk_frames(direction), ANIMATION_SPEED)
+            )
+            for direction in FACINGS
+        }
+        self.player_animator = Animator(clips, 1)
+
+        # simulation time at which the gun is ready again
+        self.next_shot = SHOOT_DELAY
+
+        self.player_list = arcade.SpriteList()
+        self.player = arcade.Sprite()
+        self.player_animator.play(0, self.idle_clip)
+        self.player.texture = self.player_animator.current(0)
+        self.player.scale = 2
+        self.player.center_x = SCREEN_WIDTH // 2
+        self.player.center_y = SCREEN_HEIGHT // 2
+        self.player_list.append(self.player)
+
+        self.projectiles = ProjectileSystem(
+            PROJECTILE_CAPACITY,
+            BULLET_RANGE,
+            (MAP_LEFT, MAP_RIGHT, MAP_BOTTOM, MAP_TOP),
+            (SCREEN_WIDTH, SCREEN_HEIGHT),
+            BULLET_WALL_MARGIN,
+            extents=bullet_extents(),
+            sprite_pool=sprite_pool,
+            sprite_list=sprite_list
+        )
+        self.enemies = EnemyManager(self.rng.getrandbits(64))
+        self.grid = SpatialGrid(
+            MAP_LEFT, MAP_RIGHT, MAP_BOTTOM, MAP_TOP, GRID_CELL_SIZE,
+            self.projectiles.extents
+        )
+
+        # (x, y, strong) for every bullet that exploded during the last step;
+        # the first bound_explosions of them ran out of range or hit the border
+        self.explosions = []
+        self.bound_explosions = 0
+
+        self.room_transition_cooldown = 0
+
+        # (tick, kind, room) of everything run telemetry cares about
+        self.events = []
+        self.tick = 0
+
+        self.player_hp = PLAYER_MAX_HP
+        self.enter_room(self.rooms.start)
+
+        self.killed_pears = 0
+        self.game_finished = False
+        self.result = None
+
+    @property
+    def time(self):
+        return self.tick * FIXED_TIMESTEP
+
+    def run(self, max_ticks):
+        while not self.game_finished and self.tick < max_ticks:
+            self.step()
+
+        return self.result
+
+    def step(self, delta_time=FIXED_TIMESTEP):
+        self.explosions.clear()
+        self.bound_explosions = 0
+
+        if self.game_finished:
+            return
+
+        # both bounds come from the tick counter, start + delta_time can
+        # round past the next tick's start and drain its input early
+        start = self.time
+        self.tick += 1
+        end = self.time
+        probe = self.profiler.probe
+
+        with probe("input"):
+            # gun keys as they were when the tick began, shooting replays
+            # the events over them
+            shooting = {action: getattr(self, action) for action in SHOOT_ACTIONS}
+            events = list(self.input_queue.drain(end))
+
+            # a key tapped and released within the tick still counts
+            held = {action for action in INPUT_FLAGS if getattr(self, action)}
+            for time, action, pressed in events:
+                setattr(self, action, pressed)
+                if pressed:
+                    held.add(action)
+
+            self.player.change_x = 0
+            self.player.change_y = 0
+
+            moving = False
+
+            if "up" in held:
+                self.player.change_y = PLAYER_SPEED
+                self.facing = "up"
+                moving = True
+            elif "down" in held:
+                self.player.change_y = -PLAYER_SPEED
+                self.facing = "down"
+                moving = True
+            elif "left" in held:
+                self.player.change_x = -PLAYER_SPEED
+                self.facing = "left"
+                moving = True
+            elif "right" in held:
+                self.player.change_x = PLAYER_SPEED
+                self.facing = "right"
+                moving = True
+
+            self.animate_player(self.walk_clips[self.facing] if moving else self.idle_clip)
+
+        with probe("physics"):
+            self.physics_engine.update()
+
+            self.player.center_x = max(BORDER, min(self.player.center_x, SCREEN_WIDTH - BORDER))
+            self.player.center_y = max(BORDER, min(self.player.center_y, SCREEN_HEIGHT - BORDER))
+
+        with probe("shooting"):
+            self.fire(shooting, events, start, end)
+            self.projectiles.move()
+
+        with probe("rooms"):
+            if self.room_transition_cooldown > 0:
+                self.room_transition_cooldown -= delta_time
+
+            if self.room_transition_cooldown <= 0:
+                room_exit = self.room.exit_at(self.player.center_x, self.player.center_y)
+                if room_exit:
+                    self.enter_room(room_exit.target, room_exit.spawn)
+                    self.room_transition_cooldown = 0.4
+
+        with probe("enemies"):
+            self.enemies.update(delta_time)
+
+        with probe("bullets"):
+            self.explosions.extend(self.projectiles.resolve_bounds())
+            self.bound_explosions = len(self.explosions)
+
+        with probe("collisions"):
+            self.check_collisions()
+
+    def check_collisions(self):
+        enemies = self.enemies
+        enemy_boxes = enemies.boxes()
+        player = self.player
+        player_box = np.array([[player.left, player.right, player.bottom, player.top]])
+
+        idx, bullet_pos = self.projectiles.live()
+        bullet_wall, bullet_enemy, player_enemy = self.grid.query(
+            bullet_pos,
+            self.wall_boxes,
+            enemy_boxes,
+            player_box
+        )
+
+        for enemy in player_enemy[1].tolist():
+            if enemies.ai.state[enemy] == ACTIVE:
+                if arcade.check_for_collision(self.player, enemies.sprites[enemy]):
+                    self.player_hp -= 1
+                    print("Игрок получил урон")
+                    self.log("damage")
+
+                    enemies.rest(enemy)
+
+                    if self.player_hp <= 0:
+                        self.finish("lose", "pear")
+
+        hit_wall = np.zeros(len(idx), dtype=bool)
+        hit_wall[bullet_wall[0]] = True
+        if hit_wall.any():
+            walls = idx[hit_wall]
+            for x, y in self.projectiles.transform.pos[walls].tolist():
+                self.explosions.append((x, y, True))
+            self.projectiles.kill(walls.tolist())
+
+        bullets, targets = bullet_enemy
+        keep = ~hit_wall[bullets]
+        bullets = idx[bullets[keep]]
+        targets = targets[keep]
+        order = np.argsort(self.projectiles.slots.serial[bullets], kind="stable")
+
+        dead = []
+        for bullet, enemy in zip(bullets[order].tolist(), targets[order].tolist()):
+            if enemies.health.hp[enemy] <= 0:
+                continue
+
+            self.hit_enemy(enemy)
+            dead.append(bullet)
+
+        self.projectiles.kill(dead)
+        enemies.remove_dead()
+
+    def animate_player(self, clip):
+        animator = self.player_animator
+        if animator.clip[0] != clip:
+            animator.play(0, clip)
+        elif not len(animator.advance()[0]):
+            return
+
+        self.player.texture = animator.current(0)
+
+    def hit_enemy(self, enemy):
+        if self.enemies.hit(enemy):
+            self.killed_pears += 1
+            self.log("kill")
+
+            if self.killed_pears >= 2:
+                self.finish("win", "player")
+
+    def log(self, kind):
+        self.events.append((self.tick, kind, self.current_map))
+
+    def run_record(self):
+        result, who_kill = self.result or ("timeout", None)
+        kills = [tick for tick, kind, room in self.events if kind == "kill"]
+        rooms = [room for tick, kind, room in self.events if kind == "room"]
+
+        return {
+            "seed": self.seed,
+            "floor_size": self.floor_size,
+            "result": result,
+            "who_kill": who_kill,
+            "ticks": self.tick,
+            "duration": self.tick * FIXED_TIMESTEP,
+            "kills": len(kills),
+            "shots": sum(kind == "shot" for tick, kind, room in self.events),
+            "damage": sum(kind == "damage" for tick, kind, room in self.events),
+            "first_kill": kills[0] * FIXED_TIMESTEP if kills else None,
+            "last_room": self.current_map,
+            "room_path": " > ".join(rooms),
+            "events": [event for event in self.events if event[1] in LOGGED_EVENTS],
+        }
+
+    def finish(self, result, who_kill):
+        if not self.game_finished:
+            self.game_finished = True
+            self.result = (result, who_kill)
+
+    def fire(self, shooting, events, start, end):
+        # walks the tick from event to event, so every shot leaves at its
+        # own time rather than on the next tick boundary
+        since = start
+        for time, action, pressed in events:
+            self.fire_held(shooting, since, time, start)
+
+            if action in shooting:
+                shooting[action] = pressed
+                if pressed and self.next_shot <= time:
+                    self.fire_at(SHOOT_ACTIONS[action], time, start)
+            since = time
+
+        self.fire_held(shooting, since, end, start)
+
+    def fire_held(self, shooting, since, until, start):
+        direction = next(
+            (direction for action, direction in SHOOT_ACTIONS.items() if shooting[action]),
+            None
+        )
+        if direction is None:
+            return
+
+        time = max(since, self.next_shot)
+        while time < until:
+            self.fire_at(direction, time, start)
+            time = self.next_shot
+
+    def fire_at(self, direction, time, start):
+        self.shoot(direction, (time - start) / FIXED_TIMESTEP)
+        self.next_shot = time + SHOOT_DELAY
+
+    def shoot(self, direction, lag=0):
+        # lag is the part of the tick that passed before the shot; the
+        # bullet starts that far behind so the move this tick evens it out
+        change_x = change_y = 0
+
+        if direction == "up":
+            change_y = BULLET_SPEED
+        elif direction == "down":
+            change_y = -BULLET_SPEED
+        elif direction == "left":
+            change_x = -BULLET_SPEED
+        elif direction == "right":
+            change_x = BULLET_SPEED
+
+        self.log("shot")
+        self.projectiles.spawn(
+            self.player.center_x - change_x * lag,
+            self.player.center_y - change_y * lag,
+            change_x,
+            change_y
+        )
+
+    def push_input(self, time, key, pressed):
+        self.input_queue.push(time, key, pressed)
+
+    def on_key_press(self, key, modifiers=0):
+        # unstamped input lands at the start of the next tick
+        self.push_input(self.time, key, True)
+
+    def on_key_release(self, key, modifiers=0):
+        self.push_input(self.time, key, False)
+
+    def enter_room(self, name, spawn=None):
+        if self.room is not None and self.rooms.persistent:
+            self.room.saved_enemies = self.enemies.pack()
+
+        self.load_room(name)
+        self.log("room")
+
+        if spawn:
+            self.player.center_x, self.player.center_y = spawn
+
+        self.spawn_enemies_for_room()
+
+    def load_room(self, name):
+        self.room = self.rooms.room(name, self.player)
+        self.current_map = name
+
+        self.wall_list = self.room.wall_list
+        self.wall_boxes = self.room.wall_boxes
+        self.physics_engine = self.room.physics_engine
+
+    def spawn_enemies_for_room(self):
+        self.enemies.clear()
+
+        if self.room.saved_enemies is not None:
+            self.enemies.unpack(self.room.saved_enemies)
+            return
+
+        for enemy, count in self.room.spawns:
+            for _ in range(count):
+                self.enemies.spawn(
+                    enemy,
+                    self.rng.randint(MAP_LEFT + 40, MAP_RIGHT - 40),
+                    self.rng.randint(MAP_BOTTOM + 40, MAP_TOP - 40)
+                )
+
+    def snapshot(self):
+        writer = SnapshotWriter()
+        writer.pack(HEADER, SNAPSHOT_MAGIC, SNAPSHOT_VERSION, self.seed, self.floor_size, self.tick)
+
+        flags = sum(getattr(self, name) << bit for bit, name in enumerate(INPUT_FLAGS))
+        writer.pack(
+            SIM_STATE,
+            self.player.center_x,
+            self.player.center_y,
+            self.player_hp,
+            self.killed_pears,
+            flags,
+            FACINGS.index(self.facing),
+            self.next_shot,
+            self.room_transition_cooldown,
+            self.game_finished
+        )
+        writer.text(self.current_map)
+
+        result, who_kill = self.result or ("", "")
+        writer.text(result)
+        writer.text(who_kill)
+
+        version, state, gauss = self.rng.getstate()
+        writer.pack(RANDOM_STATE, *state)
+
+        saved = [room for room in self.rooms.rooms.values() if room.saved_enemies is not None]
+        writer.pack(SIZE, len(saved))
+        for room in saved:
+            writer.text(room.name)
+            writer.bytes(room.saved_enemies)
+
+        self.player_animator.write_state(writer)
+        self.projectiles.write_state(writer)
+        self.enemies.write_state(writer)
+        return writer.getvalue()
+
+    def restore(self, data):
+        seed, floor_size, tick = read_header(data)
+        if seed != self.seed or floor_size != self.floor_size:
+            raise ValueError("snapshot belongs to another game")
+
+        reader = SnapshotReader(data, HEADER.size)
+        self.tick = tick
+
+        (x, y, self.player_hp, self.killed_pears, flags, facing,
+         self.next_shot, self.room_transition_cooldown,
+         self.game_finished) = reader.unpack(SIM_STATE)
+
+        # whatever was queued belongs to the timeline being left
+        self.input_queue.clear(self.time)
+
+        for bit, name in enumerate(INPUT_FLAGS):
+            setattr(self, name, bool(flags >> bit & 1))
+        self.facing = FACINGS[facing]
+
+        self.load_room(reader.text())
+        self.player.position = x, y
+
+        result, who_kill = reader.text(), reader.text()
+        self.result = (result, who_kill) if result else None
+
+        self.rng.setstate((3, reader.unpack(RANDOM_STATE), None))
+
+        for room in self.rooms.rooms.values():
+            room.saved_enemies = None
+        count, = reader.unpack(SIZE)
+        for _ in range(count):
+            name = reader.text()
+            self.rooms.rooms[name].saved_enemies = bytes(reader.bytes())
+
+        self.player_animator.read_state(reader)
+        self.player.texture = self.player_animator.current(0)
+
+        self.projectiles.read_state(reader)
+        self.enemies.read_state(reader)
+        self.explosions.clear()
+        self.bound_explosions = 0
+
+        self.events = [event for event in self.events if event[0] <= tick]
@@ -0,0 +1,111 @@
+import struct
+from collections import deque
+
+import numpy as np
+
+
+SNAPSHOT_MAGIC = b"ISSN"
+SNAPSHOT_VERSION = 4
+
+# magic, version, seed, floor size, tick
+HEADER = struct.Struct("<4sBQHI")
+SIZE = struct.Struct("<I")
+
+
+class SnapshotWriter:
+    # Every field is stored as a length-prefixed run of raw bytes. Arrays go
+    # in through the buffer protocol, so capture is a single join.
+
+    def __init__(self):
+        self.chunks = []
+
+    def pack(self, layout, *values):
+        self.chunks.append(layout.pack(*values))
+
+    def bytes(self, data):
+        self.chunks.append(SIZE.pack(len(data)))
+        self.chunks.append(data)
+
+    def text(self, value):
+        self.bytes(value.encode("utf-8"))
+
+    def array(self, values):
+        values = np.ascontiguousarray(values)
+        self.chunks.append(SIZE.pack(values.nbytes))
+        self.chunks.append(values.reshape(-1).view(np.uint8))
+
+    def getvalue(self):
+        return b"".join(self.chunks)
+
+
+class SnapshotReader:
+    # Arrays come back as read-only views into the snapshot buffer; the
+    # caller copies them into its own state.
+
+    def __init__(self, data, offset=0):
+        self.view = memoryview(data)
+        self.offset = offset
+
+    def unpack(self, layout):
+        values = layout.unpack_from(self.view, self.offset)
+        self.offset += layout.size
+        return values
+
+    def bytes(self):
+        size, = self.unpack(SIZE)
+        data = self.view[self.offset:self.offset + size]
+        self.offset += size
+        return data
+
+    def text(self):
+        return str(self.bytes(), "utf-8")
+
+    def array(self, dtype, shape=(-1,)):
+        return np.frombuffer(self.bytes(), dtype=dtype).reshape(shape)
+
+
+def read_header(data):
+    magic, version, seed, floor_size, tick = HEADER.unpack_from(data)
+    if magic != SNAPSHOT_MAGIC or version != SNAPSHOT_VERSION:
+        raise ValueError("not a snapshot")
+    return seed, floor_size, tick
+
+
+def save_snapshot(path, data):
+    with open(path, "wb") as file:
+        file.write(data)
+
+
+def load_snapshot(path):
+    with open(path, "rb") as file:
+        data = file.read()
+
+    try:
+        read_header(data)
+    except (ValueError, struct.error):
+        raise ValueError(f"{path} is not a snapshot file")
+    return data
+
+
+class SnapshotRing:
+    def __init__(self, capacity):
+        self.snapshots = deque(maxlen=capacity)
+
+    def __len__(self):
+        return len(self.snapshots)
+
+    def push(self, data):
+        self.snapshots.append(data)
+
+    def rewind(self, count):
+        # drops the newest snapshots and returns the one `count` back
+        if not self.snapshots:
+            return None
+
+        count = min(count, len(self.snapshots) - 1)
+        for _ in range(count):
+            self.snapshots.pop()
+        return self.snapshots[-1]
+
+    def clear(self):
+        self.snapshots.clear()
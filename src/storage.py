@@ -0,0 +1,191 @@
+import queue
+import sqlite3
+import threading
+import time
+
+from constants import DB_PATH
+
+
+WRITER_FLUSH_INTERVAL = 0.5
+WRITER_CLOSE_TIMEOUT = 1.0
+
+STOP = object()
+
+RUN_COLUMNS = (
+    "started_at", "seed", "floor_size", "result", "who_kill", "duration",
+    "kills", "shots", "damage", "first_kill", "last_room", "room_path",
+)
+
+
+def migrate_runs(conn):
+    # the original table only had result and who_kill, those rows are kept
+    conn.execute("""
+        CREATE TABLE runs (
+            id INTEGER PRIMARY KEY,
+            started_at REAL,
+            seed INTEGER,
+            floor_size INTEGER,
+            result TEXT NOT NULL,
+            who_kill TEXT,
+            duration REAL,
+            kills INTEGER,
+            shots INTEGER,
+            damage INTEGER,
+            first_kill REAL,
+            last_room TEXT,
+            room_path TEXT
+        )
+    """)
+    conn.execute("""
+        CREATE TABLE run_events (
+            run_id INTEGER NOT NULL REFERENCES runs (id),
+            tick INTEGER NOT NULL,
+            kind TEXT NOT NULL,
+            room TEXT
+        )
+    """)
+
+    # hourly totals kept up to date on insert, so win rate over time never
+    # has to scan the runs table
+    conn.execute("""
+        CREATE TABLE run_hours (
+            hour INTEGER PRIMARY KEY,
+            games INTEGER NOT NULL,
+            wins INTEGER NOT NULL
+        )
+    """)
+    conn.execute("""
+        CREATE TRIGGER runs_rollup AFTER INSERT ON runs
+        WHEN NEW.started_at IS NOT NULL
+        BEGIN
+            INSERT INTO run_hours (hour, games, wins)
+            VALUES (CAST(NEW.started_at / 3600 AS INTEGER), 1, NEW.result = 'win')
+            ON CONFLICT (hour) DO UPDATE SET
+                games = games + 1,
+                wins = wins + excluded.wins;
+        END
+    """)
+
+    has_data = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'Data'"
+    ).fetchone()
+    if has_data:
+        conn.execute("INSERT INTO runs (id, result, who_kill) SELECT id, result, who_kill FROM Data")
+        conn.execute("DROP TABLE Data")
+
+    conn.execute("CREATE INDEX runs_by_time ON runs (started_at)")
+    conn.execute("CREATE INDEX runs_by_end ON runs (result, last_room)")
+    conn.execute("CREATE INDEX runs_by_first_kill ON runs (first_kill) WHERE first_kill IS NOT NULL")
+    conn.execute("CREATE INDEX run_events_by_run ON run_events (run_id)")
+    conn.execute("CREATE INDEX run_events_by_kind ON run_events (kind, room)")
+
+
+# PRAGMA user_version is the number of migrations applied
+MIGRATIONS = [migrate_runs]
+
+
+def migrate(conn):
+    version, = conn.execute("PRAGMA user_version").fetchone()
+    if version >= len(MIGRATIONS):
+        return
+
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        version, = conn.execute("PRAGMA user_version").fetchone()
+        for migration in MIGRATIONS[version:]:
+            migration(conn)
+        conn.execute(f"PRAGMA user_version = {len(MIGRATIONS)}")
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+    conn.execute("COMMIT")
+
+
+def connect(path=DB_PATH):
+    conn = sqlite3.connect(path, timeout=10)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    migrate(conn)
+    return conn
+
+
+class ResultWriter:
+    def __init__(self, path=DB_PATH, flush_interval=WRITER_FLUSH_INTERVAL):
+        self.path = path
+        self.flush_interval = flush_interval
+
+        self.queue = queue.Queue()
+        self.written = 0
+        self.error = None
+
+        self.thread = threading.Thread(target=self.run, name="ResultWriter", daemon=True)
+        self.thread.start()
+
+    def save(self, run):
+        self.queue.put(run)
+
+    def close(self, timeout=WRITER_CLOSE_TIMEOUT):
+        self.queue.put(STOP)
+        self.thread.join(timeout)
+        # a failed connect, migration or insert loses results as surely
+        # as a timeout does
+        return not self.thread.is_alive() and self.error is None
+
+    def run(self):
+        try:
+            conn = connect(self.path)
+        except sqlite3.Error as error:
+            self.error = error
+            return
+
+        stopping = False
+        while not stopping:
+            item = self.queue.get()
+            if item is STOP:
+                break
+
+            rows = [item]
+            deadline = time.monotonic() + self.flush_interval
+
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+
+                try:
+                    item = self.queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+
+                if item is STOP:
+                    stopping = True
+                    break
+                rows.append(item)
+
+            try:
+                self.write(conn, rows)
+            except sqlite3.Error as error:
+                self.error = error
+
+        conn.close()
+
+    def write(self, conn, rows):
+        insert_run = (
+            f"INSERT INTO runs ({', '.join(RUN_COLUMNS)}) "
+            f"VALUES ({', '.join('?' * len(RUN_COLUMNS))})"
+        )
+
+        with conn:
+            events = []
+            for run in rows:
+                run_id = conn.execute(
+                    insert_run,
+                    [run.get(column) for column in RUN_COLUMNS]
+                ).lastrowid
+                events.extend((run_id, *event) for event in run.get("events", ()))
+
+            conn.executemany(
+                "INSERT INTO run_events (run_id, tick, kind, room) VALUES (?, ?, ?, ?)",
+                events
+            )
+        self.written += len(rows)